@@ -0,0 +1,82 @@
+"""
+Benchmark: decoding gRPC find replies
+
+Compares eager decoding of a 10k row FindVersions reply (every field & facet copied into
+each Version) with lazy decoding (each Version wraps its message & reads fields on access).
+
+No server is needed; the reply is built & parsed in process, as the stub would. Parsing
+costs the same either way so it's reported once & left out of the other timings.
+
+Reports, in milliseconds
+  - time to parse the reply
+  - time to decode the reply
+  - time to decode & read .id of every result
+  - time to decode & read every field & facets of every result
+"""
+import time
+import uuid
+
+from wysteria.middleware import impl_grpc
+from wysteria.middleware.wgrpc.wysteria import grpc_pb2 as pb
+
+
+_ROWS = 10000
+_RUNS = 5
+
+
+def _reply() -> bytes:
+    """Return a serialised FindVersions reply as the server would send it."""
+    return pb.Versions(all=[
+        pb.Version(
+            Id=str(uuid.uuid4()),
+            Uri="/collection/item/%d" % i,
+            Number=i,
+            Parent=str(uuid.uuid4()),
+            Facets={"publisher": "someone", "shot": "sh%03d" % (i % 100), "ok": "true"},
+        ) for i in range(0, _ROWS)
+    ]).SerializeToString()
+
+
+def _ids(results):
+    for r in results:
+        r.id
+
+
+def _everything(results):
+    for r in results:
+        r.id, r.uri, r.parent, r.version, r.facets
+
+
+def _time(codec, data, use) -> float:
+    best = None
+    for _ in range(0, _RUNS):
+        reply = pb.Versions.FromString(data)
+        start = time.perf_counter()
+        use(codec._decode_results(reply, codec._decode_version))
+        taken = (time.perf_counter() - start) * 1000
+        best = taken if best is None else min(best, taken)
+    return best
+
+
+def main():
+    data = _reply()
+    eager = impl_grpc._GRPCCodec()
+    lazy = impl_grpc._GRPCCodec()
+    lazy._lazy = True
+
+    start = time.perf_counter()
+    pb.Versions.FromString(data)
+    print("%-14s %7.1fms" % ("parse", (time.perf_counter() - start) * 1000))
+
+    for name, use in [
+        ("decode", lambda results: None),
+        ("decode + ids", _ids),
+        ("decode + all", _everything),
+    ]:
+        print("%-14s eager %7.1fms   lazy %7.1fms" % (
+            name, _time(eager, data, use), _time(lazy, data, use)
+        ))
+
+
+if __name__ == "__main__":
+    main()
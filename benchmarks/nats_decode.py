@@ -0,0 +1,68 @@
+"""
+Benchmark: decoding NATS find replies
+
+Compares the previous reply path (bytes -> str -> json.loads -> lowercased copy of each
+result) with wysteria.middleware.codec, which decodes bytes directly & maps keys in one pass.
+
+No server is needed; a 500 row find_versions reply is built in process.
+
+Reports
+  - replies decoded per second, for each codec available
+"""
+import json
+import time
+import uuid
+
+from wysteria.middleware import codec
+from wysteria.middleware import impl_nats
+
+
+_ROWS = 500
+_SECONDS = 2.0
+
+
+def _reply() -> bytes:
+    """Return an encoded find_versions reply as the server would send it."""
+    return json.dumps({
+        "All": [
+            {
+                "Id": str(uuid.uuid4()),
+                "Uri": "/collection/item/%d" % i,
+                "Number": i,
+                "Parent": str(uuid.uuid4()),
+                "Facets": {"publisher": "someone", "shot": "sh%03d" % (i % 100), "ok": "true"},
+            } for i in range(0, _ROWS)
+        ],
+        "Error": "",
+    }).encode("utf8")
+
+
+def _before(data: bytes) -> list:
+    reply = json.loads(data.decode())
+    return [{k.lower(): v for k, v in result.items()} for result in reply.get("All", [])]
+
+
+def _after(c: codec.JSONCodec):
+    return lambda data: impl_nats._decode_find(c.loads(data))
+
+
+def _measure(name, func, data):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < _SECONDS:
+        func(data)
+        count += 1
+
+    print("%-20s %8.1f replies/s" % (name, count / (time.perf_counter() - start)))
+
+
+def main():
+    data = _reply()
+    _measure("str + json.loads", _before, data)
+    _measure("codec json", _after(codec.get_codec(codec.CODEC_JSON)), data)
+    if codec.orjson:
+        _measure("codec orjson", _after(codec.get_codec(codec.CODEC_ORJSON)), data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: NATS thread -> event loop handoff
+
+Compares the old polled queue handoff (reproduced below, it no longer lives in the client)
+with the event driven handoff used by wysteria.middleware.impl_nats._AsyncIONats.
+
+No server is needed; requests are answered by an in process loopback standing in for the
+nats client, so only the cost of getting a request onto the loop & the reply back is measured.
+
+Reports
+  - CPU seconds burned by the transport thread per wall clock second while idle
+  - round trip latency of a single request (median & p99, microseconds)
+"""
+import asyncio
+import queue
+import statistics
+import threading
+import time
+
+from wysteria.middleware import impl_nats
+
+
+_IDLE_SECONDS = 1.0
+_REQUESTS = 2000
+
+
+class _Reply:
+    def __init__(self, data):
+        self.data = data
+
+
+class _LoopbackNats:
+    """Stands in for nats.aio.client.Client, echoes requests straight back."""
+
+    is_connected = True
+
+    async def connect(self, io_loop=None, **kwargs):
+        pass
+
+    async def request(self, key, data, timeout=None):
+        return _Reply(data)
+
+    async def close(self):
+        pass
+
+
+class _PolledHandoff(threading.Thread):
+    """The previous handoff: a coroutine spinning on a queue.Queue, replies on queue.Queues."""
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._conn = _LoopbackNats()
+        self._outgoing = queue.Queue()
+        self._running = True
+
+    async def main(self):
+        while self._running:
+            if self._outgoing.empty():
+                continue
+
+            reply_queue, key, data = self._outgoing.get_nowait()
+            if reply_queue is None:
+                break
+
+            result = await self._conn.request(key, bytes(data, encoding="utf8"))
+            reply_queue.put_nowait(result.data.decode())
+
+    def request(self, data, key, timeout=5):
+        q = queue.Queue()
+        self._outgoing.put_nowait((q, key, data))
+        return q.get(timeout=timeout)
+
+    def stop(self):
+        self._running = False
+        self._outgoing.put((None, None, None))
+
+    def run(self):
+        asyncio.new_event_loop().run_until_complete(self.main())
+
+
+def _event_driven():
+    """Return a started _AsyncIONats talking to the loopback."""
+    impl_nats.NatsClient = _LoopbackNats
+    conn = impl_nats._AsyncIONats(["nats://loopback:4222"], None)
+    conn.daemon = True
+    conn.start()
+    conn.request("warmup", "w.client.fc")
+    return conn
+
+
+def _measure(name, conn):
+    # idle cpu: the main thread sleeps, so process time is (nearly) all transport thread
+    cpu = time.process_time()
+    time.sleep(_IDLE_SECONDS)
+    idle = (time.process_time() - cpu) / _IDLE_SECONDS
+
+    latencies = []
+    for i in range(0, _REQUESTS):
+        start = time.perf_counter()
+        conn.request("ping", "w.client.fc")
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    latencies.sort()
+    print("%-14s idle cpu %5.2f cpu-s/s   latency median %7.1fus   p99 %7.1fus" % (
+        name,
+        idle,
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99)],
+    ))
+    conn.stop()
+
+
+def main():
+    before = _PolledHandoff()
+    before.start()
+    _measure("polled queue", before)
+
+    _measure("event driven", _event_driven())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: encoding find queries
+
+Compares the previous QueryDesc encoders (reproduced below, every field sent & facets through
+a Struct) with the sparse, memoised encoders now used by both middlewares.
+
+No server is needed, only the cost of encoding a query is measured.
+
+Reports, for an OR list of by-id QueryDescs & for a small query with facets
+  - payload size in bytes (JSON for NATS, serialised protobuf for gRPC)
+  - microseconds to encode a fresh query & to encode the same query again
+"""
+import json
+import time
+import uuid
+
+from google.protobuf.struct_pb2 import Struct
+
+from wysteria import domain
+from wysteria.middleware import codec
+from wysteria.middleware import impl_grpc
+from wysteria.middleware import impl_nats
+from wysteria.middleware.wgrpc.wysteria import grpc_pb2 as pb
+
+
+_IDS = 2000
+_SECONDS = 1.0
+
+
+def _old_json(query):
+    return json.dumps({
+        "query": [{
+            "id": q._id,
+            "uri": q._uri,
+            "parent": q._parent,
+            "versionnumber": q._versionnumber,
+            "itemtype": q._itemtype,
+            "variant": q._variant,
+            "facets": dict(q._facets),
+            "name": q._name,
+            "resourcetype": q._resourcetype,
+            "location": q._location,
+            "linksrc": q._linksrc,
+            "linkdst": q._linkdst,
+        } for q in query if q.is_valid],
+        "limit": 500,
+        "offset": 0,
+    }).encode("utf8")
+
+
+def _old_struct(data):
+    s = Struct()
+    for key, value in data.items():
+        s.update({str(key): str(value)})
+    return s
+
+
+def _old_pb(query):
+    return pb.QueryDescs(Limit=500, Offset=0, all=[
+        pb.QueryDesc(
+            Parent=q._parent,
+            Id=q._id,
+            Uri=q._uri,
+            VersionNumber=q._versionnumber,
+            ItemType=q._itemtype,
+            Variant=q._variant,
+            Facets=_old_struct(q._facets),
+            Name=q._name,
+            ResourceType=q._resourcetype,
+            Location=q._location,
+            LinkSrc=q._linksrc,
+            LinkDst=q._linkdst,
+        ) for q in query if q.is_valid
+    ])
+
+
+def _time(func, build):
+    """Return (us to encode a fresh query, us to encode the same query again)."""
+    fresh, count = 0.0, 0
+    while fresh < _SECONDS:
+        query = build()
+        impl_nats._PREPARED.clear()
+        impl_grpc._PREPARED.clear()
+        start = time.perf_counter()
+        func(query)
+        fresh += time.perf_counter() - start
+        count += 1
+    fresh = fresh / count * 1e6
+
+    query = build()
+    func(query)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < _SECONDS:
+        func(query)
+        count += 1
+    again = (time.perf_counter() - start) / count * 1e6
+    return fresh, again
+
+
+def _report(title, build):
+    grpc_codec = impl_grpc._GRPCCodec()
+    json_codec = codec.get_codec(codec.CODEC_JSON)
+
+    new_json = lambda q: impl_nats._encode_find(q, 500, 0, json_codec)
+    new_pb = lambda q: grpc_codec._encode_query_descs(q, 500, 0)
+
+    print(title)
+    for name, func, size in [
+        ("nats before", _old_json, lambda q: len(_old_json(q))),
+        ("nats after", new_json, lambda q: len(new_json(q))),
+        ("grpc before", _old_pb, lambda q: _old_pb(q).ByteSize()),
+        ("grpc after", new_pb, lambda q: new_pb(q).ByteSize()),
+    ]:
+        fresh, again = _time(func, build)
+        print("  %-12s %8d bytes   fresh %10.1fus   again %10.1fus" % (
+            name, size(build()), fresh, again
+        ))
+
+
+def main():
+    _report(
+        "%d by-id descs" % _IDS,
+        lambda: [domain.QueryDesc().id(str(uuid.uuid4())) for _ in range(0, _IDS)],
+    )
+    _report(
+        "1 desc with facets",
+        lambda: [domain.QueryDesc().item_type("shot").has_facets(project="abc", shot="010")],
+    )
+
+
+if __name__ == "__main__":
+    main()
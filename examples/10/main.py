@@ -0,0 +1,22 @@
+"""
+Example10: asyncio
+"""
+import asyncio
+
+from wysteria.domain import QueryDesc
+from wysteria.middleware import AsyncNatsMiddleware
+
+
+async def main():
+    async with AsyncNatsMiddleware() as conn:
+        items = await conn.find_items([QueryDesc().item_type("tree")])
+
+        # every published version lookup is in flight at the same time
+        published = await asyncio.gather(*[conn.get_published_version(i.id) for i in items])
+
+        for item, version in zip(items, published):
+            print(item.variant, "=>", version)
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,100 @@
+import concurrent.futures
+import threading
+import time
+import types
+
+import pytest
+
+from wysteria.middleware import batcher
+
+
+class _Server:
+    """Fake find by ids, recording the ids of each find"""
+
+    def __init__(self, known: set, error: Exception=None):
+        self.known = known
+        self.error = error
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, ids: list) -> list:
+        with self.lock:
+            self.sent.append(list(ids))
+        if self.error is not None:
+            raise self.error
+        return [types.SimpleNamespace(id=i) for i in ids if i in self.known]
+
+
+def _load_all(batches, server, ids: list) -> list:
+    """Look up each id from a thread of its own, returning the futures of each lookup"""
+    with concurrent.futures.ThreadPoolExecutor(len(ids)) as pool:
+        return [pool.submit(batches.load, "item", oid, server.send) for oid in ids]
+
+
+class TestBatcher:
+    """Tests for batching lookups by id"""
+
+    def test_lookups_in_one_window_are_sent_together(self):
+        # arrange
+        batches = batcher.Batcher(window=0.2)
+        server = _Server({"a", "b"})
+
+        # act
+        _load_all(batches, server, ["a", "b", "c"])
+
+        # assert
+        assert len(server.sent) == 1
+        assert sorted(server.sent[0]) == ["a", "b", "c"]
+        assert batches.report() == {"lookups": 3, "batches": 1}
+
+    def test_each_lookup_gets_its_own_object(self):
+        # arrange
+        batches = batcher.Batcher(window=0.2)
+        server = _Server({"a", "b"})
+
+        # act
+        futures = _load_all(batches, server, ["a", "b", "c"])
+
+        # assert
+        assert [o.id for o in futures[0].result()] == ["a"]
+        assert [o.id for o in futures[1].result()] == ["b"]
+        assert futures[2].result() == []
+
+    def test_full_batch_is_sent_without_waiting_out_the_window(self):
+        # arrange
+        batches = batcher.Batcher(window=5, size=2)
+        server = _Server({"a", "b"})
+        start = time.monotonic()
+
+        # act
+        futures = _load_all(batches, server, ["a", "b"])
+
+        # assert
+        assert time.monotonic() - start < 1
+        assert [f.result()[0].id for f in futures] == ["a", "b"]
+
+    def test_lookups_past_the_batch_size_go_in_the_next_batch(self):
+        # arrange
+        batches = batcher.Batcher(window=0.2, size=2)
+        server = _Server({"a", "b", "c"})
+
+        # act
+        futures = _load_all(batches, server, ["a", "b", "c"])
+
+        # assert
+        assert sorted(len(ids) for ids in server.sent) == [1, 2]
+        assert sorted(f.result()[0].id for f in futures) == ["a", "b", "c"]
+
+    def test_error_is_raised_to_every_lookup_in_the_batch(self):
+        # arrange
+        batches = batcher.Batcher(window=0.2)
+        server = _Server({"a", "b"}, error=ValueError("failed"))
+
+        # act
+        futures = _load_all(batches, server, ["a", "b"])
+
+        # assert
+        assert len(server.sent) == 1
+        for f in futures:
+            with pytest.raises(ValueError):
+                f.result()
@@ -0,0 +1,268 @@
+import time
+
+from wysteria import cache
+from wysteria import domain
+
+
+def _item(oid: str) -> domain.Item:
+    """Create and return an item with the given id, not bound to any connection
+
+    Returns:
+        domain.Item
+    """
+    return domain.Item(None, id=oid, parent="parent", itemtype="type", variant="variant")
+
+
+def _version(oid: str, item_id: str) -> domain.Version:
+    """Create and return a version of the given item, not bound to any connection
+
+    Returns:
+        domain.Version
+    """
+    return domain.Version(None, id=oid, parent=item_id, number=1)
+
+
+class TestObjectCache:
+    """Tests for the object cache"""
+
+    def test_get_fetches_once_and_shares_the_object(self):
+        # arrange
+        objects = cache.ObjectCache(10)
+        fetched = []
+
+        def fetch():
+            fetched.append(1)
+            return _item("a")
+
+        # act
+        first = objects.get("a", fetch)
+        second = objects.get("a", fetch)
+
+        # assert
+        assert first is second
+        assert len(fetched) == 1
+        assert objects.stats["hits"] == 1
+        assert objects.stats["misses"] == 1
+
+    def test_least_recently_used_object_is_evicted(self):
+        # arrange
+        objects = cache.ObjectCache(2)
+        objects.put(_item("a"))
+        objects.put(_item("b"))
+        objects.get("a", lambda: None)
+
+        # act
+        objects.put(_item("c"))
+
+        # assert
+        assert objects.peek("a") is not None
+        assert objects.peek("b") is None
+        assert objects.peek("c") is not None
+        assert objects.stats["evictions"] == 1
+
+    def test_object_expires_after_its_ttl(self):
+        # arrange
+        objects = cache.ObjectCache(10, ttl={"item": 0.05})
+        objects.put(_item("a"))
+
+        # act
+        time.sleep(0.1)
+        result = objects.get("a", lambda: None)
+
+        # assert
+        assert result is None
+        assert objects.stats["expirations"] == 1
+
+    def test_object_invalidated_while_being_fetched_is_not_kept(self):
+        # arrange
+        objects = cache.ObjectCache(10)
+
+        def fetch():
+            objects.invalidate("a")  # eg. another thread updates it
+            return _item("a")
+
+        # act
+        result = objects.get("a", fetch)
+
+        # assert
+        assert result.id == "a"
+        assert objects.peek("a") is None
+
+    def test_put_with_stale_generation_is_dropped(self):
+        # arrange
+        objects = cache.ObjectCache(10)
+        generation = objects.generation
+        objects.clear()
+
+        # act
+        objects.put(_item("a"), generation)
+
+        # assert
+        assert objects.peek("a") is None
+
+
+class TestQueryCache:
+    """Tests for the query result cache"""
+
+    def test_key_is_the_same_whatever_the_order_of_the_query(self):
+        # arrange
+        a = domain.QueryDesc().name("a")
+        b = domain.QueryDesc().item_type("b")
+
+        # act
+        forward = cache.QueryCache.key("item", [a, b], 10, 0)
+        backward = cache.QueryCache.key("item", [b, a], 10, 0)
+
+        # assert
+        assert forward == backward
+        assert forward != cache.QueryCache.key("item", [a, b], 20, 0)
+
+    def test_get_runs_the_query_once(self):
+        # arrange
+        results = cache.QueryCache(10)
+        sent = []
+
+        def find():
+            sent.append(1)
+            return ["result"]
+
+        # act
+        first = results.get(("item",), find)
+        second = results.get(("item",), find)
+
+        # assert
+        assert first == second == ["result"]
+        assert len(sent) == 1
+
+    def test_results_over_the_byte_limit_evict_the_oldest(self):
+        # arrange
+        results = cache.QueryCache(10, max_bytes=100)
+        results.put(("a",), ["x" * 60])
+
+        # act
+        results.put(("b",), ["y" * 60])
+
+        # assert
+        assert results.lookup(("a",)) is None
+        assert results.lookup(("b",)) == ["y" * 60]
+        assert results.stats["evictions"] == 1
+
+    def test_results_of_a_query_racing_a_write_are_not_kept(self):
+        # arrange
+        results = cache.QueryCache(10)
+
+        def find():
+            results.clear()  # eg. another thread creates an object
+            return ["result"]
+
+        # act
+        found = results.get(("item",), find)
+
+        # assert
+        assert found == ["result"]
+        assert results.lookup(("item",)) is None
+
+
+class TestPublishedCache:
+    """Tests for the published version cache"""
+
+    def test_put_is_seen_by_the_next_get(self):
+        # arrange
+        published = cache.PublishedCache(10)
+        published.get("item", lambda: _version("old", "item"))
+        version = _version("new", "item")
+
+        # act
+        published.put("item", version)
+        result = published.get("item", lambda: None)
+
+        # assert
+        assert result is version
+
+    def test_invalidating_the_version_drops_its_item(self):
+        # arrange
+        published = cache.PublishedCache(10)
+        published.put("item", _version("version", "item"))
+
+        # act
+        published.invalidate("version")
+        result = published.get("item", lambda: None)
+
+        # assert
+        assert result is None
+        assert published.stats["misses"] == 1
+
+    def test_version_fetched_while_publishing_is_not_kept(self):
+        # arrange
+        published = cache.PublishedCache(10)
+        version = _version("new", "item")
+
+        def fetch():
+            published.put("item", version)  # eg. another thread publishes
+            return _version("old", "item")
+
+        # act
+        published.get("item", fetch)
+        result = published.get("item", lambda: None)
+
+        # assert
+        assert result is version
+
+
+class TestNegativeCache:
+    """Tests for the cache of lookups that found nothing"""
+
+    def test_lookup_that_found_nothing_is_not_repeated(self):
+        # arrange
+        negative = cache.NegativeCache(10)
+        sent = []
+
+        def fetch():
+            sent.append(1)
+            return None
+
+        # act
+        negative.get((cache.NEGATIVE_OBJECT, "a"), fetch)
+        negative.get((cache.NEGATIVE_OBJECT, "a"), fetch)
+
+        # assert
+        assert len(sent) == 1
+        assert negative.stats["hits"] == 1
+
+    def test_lookup_that_found_something_is_not_kept(self):
+        # arrange
+        negative = cache.NegativeCache(10)
+        negative.get((cache.NEGATIVE_OBJECT, "a"), lambda: _item("a"))
+
+        # act
+        result = negative.get((cache.NEGATIVE_OBJECT, "a"), lambda: _item("a"))
+
+        # assert
+        assert result.id == "a"
+        assert len(negative) == 0
+
+    def test_lookup_expires_after_the_ttl(self):
+        # arrange
+        negative = cache.NegativeCache(10, ttl=0.05)
+        negative.get((cache.NEGATIVE_OBJECT, "a"), lambda: None)
+        time.sleep(0.1)
+
+        # act
+        result = negative.get((cache.NEGATIVE_OBJECT, "a"), lambda: _item("a"))
+
+        # assert
+        assert result.id == "a"
+
+    def test_lookup_racing_a_create_is_not_kept(self):
+        # arrange
+        negative = cache.NegativeCache(10)
+
+        def fetch():
+            negative.invalidate((cache.NEGATIVE_OBJECT, "a"))  # eg. another thread creates it
+            return None
+
+        # act
+        negative.get((cache.NEGATIVE_OBJECT, "a"), fetch)
+
+        # assert
+        assert len(negative) == 0
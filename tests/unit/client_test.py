@@ -0,0 +1,95 @@
+import wysteria
+from wysteria import domain
+
+
+class _Finds:
+    """Fake find_collections, recording each call"""
+
+    def __init__(self, results: list):
+        self.results = results
+        self.calls = 0
+
+    def __call__(self, query, limit=None, offset=0):
+        self.calls += 1
+        return list(self.results)
+
+
+def _client(**kwargs) -> wysteria.Client:
+    """Create and return a client that isn't connected to any server
+
+    Returns:
+        wysteria.Client
+    """
+    return wysteria.Client(**kwargs)
+
+
+class TestGetCollection:
+    """Tests for looking up collections, without a server"""
+
+    def test_second_miss_does_not_ask_the_server(self):
+        # arrange
+        client = _client(negative_cache_size=10)
+        finds = client._conn.find_collections = _Finds([])
+
+        # act
+        first = client.get_collection("bar")
+        second = client.get_collection("bar")
+
+        # assert
+        assert first is None
+        assert second is None
+        assert finds.calls == 1
+        assert client._conn.negative_cache.stats["hits"] == 1
+
+    def test_ambiguous_lookup_is_remembered_as_a_miss(self):
+        # arrange
+        client = _client(negative_cache_size=10)
+        finds = client._conn.find_collections = _Finds([
+            domain.Collection(None, id="1", name="bar"),
+            domain.Collection(None, id="2", name="bar"),
+        ])
+
+        # act
+        client.get_collection("bar")
+        result = client.get_collection("bar")
+
+        # assert
+        assert result is None
+        assert finds.calls == 1
+
+    def test_miss_is_forgotten_when_something_is_created(self):
+        # arrange
+        client = _client(negative_cache_size=10)
+        finds = client._conn.find_collections = _Finds([])
+        client.get_collection("bar")
+
+        # act
+        client._conn._invalidate()  # as done by every create
+        client.get_collection("bar")
+
+        # assert
+        assert finds.calls == 2
+
+    def test_collection_found_by_name_is_cached_under_its_id(self):
+        # arrange
+        client = _client(cache_size=10)
+        client._conn.find_collections = _Finds([domain.Collection(None, id="1", name="bar")])
+
+        # act
+        found = client.get_collection("bar")
+
+        # assert
+        assert client._conn.cache.peek("1") is found
+        assert client._conn.cache.peek("bar") is None
+
+
+class TestCacheDefaults:
+    """Tests for which caches a client has by default"""
+
+    def test_object_and_negative_caches_are_off_by_default(self):
+        # act
+        client = _client()
+
+        # assert
+        assert client._conn.cache is None
+        assert client._conn.negative_cache is None
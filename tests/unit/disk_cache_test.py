@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from wysteria import disk_cache
+from wysteria import domain
+from wysteria import errors
+
+
+def _item(oid: str) -> domain.Item:
+    """Create and return an item with the given id, not bound to any connection
+
+    Returns:
+        domain.Item
+    """
+    return domain.Item(None, id=oid, parent="parent", itemtype="type", variant="variant")
+
+
+def _unreachable():
+    raise errors.ServerUnavailableError("server down")
+
+
+class TestDiskCache:
+    """Tests for the on disk cache"""
+
+    def test_object_fetched_by_one_cache_is_read_by_another(self, tmp_path):
+        # arrange
+        disk_cache.DiskCache(str(tmp_path), "server:1").get(None, "a", lambda: _item("a"))
+        other = disk_cache.DiskCache(str(tmp_path), "server:1")
+
+        # act
+        result = other.get(None, "a", lambda: None)
+
+        # assert
+        assert result.id == "a"
+        assert result.item_type == "type"
+        assert other.stats["hits"] == 1
+
+    def test_expired_object_is_served_when_server_is_unreachable(self, tmp_path):
+        # arrange
+        disk = disk_cache.DiskCache(str(tmp_path), "server:1", ttl={"item": 0.05})
+        disk.put([_item("a")])
+        time.sleep(0.1)
+
+        # act
+        result = disk.get(None, "a", _unreachable)
+
+        # assert
+        assert result.id == "a"
+        assert disk.stats["stale_hits"] == 1
+
+    def test_expired_object_is_fetched_when_server_is_reachable(self, tmp_path):
+        # arrange
+        disk = disk_cache.DiskCache(str(tmp_path), "server:1", ttl={"item": 0.05})
+        disk.put([_item("a")])
+        time.sleep(0.1)
+        fetched = []
+
+        def fetch():
+            fetched.append(1)
+            return _item("a")
+
+        # act
+        disk.get(None, "a", fetch)
+
+        # assert
+        assert len(fetched) == 1
+
+    def test_unreachable_server_raises_if_nothing_is_cached(self, tmp_path):
+        # arrange
+        disk = disk_cache.DiskCache(str(tmp_path), "server:1")
+
+        # act & assert
+        with pytest.raises(errors.ServerUnavailableError):
+            disk.get(None, "a", _unreachable)
+
+    def test_list_of_servers_shares_a_database_with_the_same_servers_as_a_string(
+        self, tmp_path
+    ):
+        # arrange
+        listed = disk_cache.DiskCache(str(tmp_path), ["server:1", "server:2"])
+
+        # act
+        joined = disk_cache.DiskCache(str(tmp_path), "server:2, server:1")
+        other = disk_cache.DiskCache(str(tmp_path), "server:3")
+
+        # assert
+        assert listed.path == joined.path
+        assert listed.path != other.path
+
+    def test_expired_object_is_not_served_when_the_deadline_passes(self, tmp_path):
+        # arrange
+        disk = disk_cache.DiskCache(str(tmp_path), "server:1", ttl={"item": 0.05})
+        disk.put([_item("a")])
+        time.sleep(0.1)
+
+        def fetch():
+            raise errors.DeadlineExceededError("Deadline exceeded")
+
+        # act & assert
+        with pytest.raises(errors.DeadlineExceededError):
+            disk.get(None, "a", fetch)
+        assert disk.stats["stale_hits"] == 0
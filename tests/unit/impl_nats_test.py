@@ -0,0 +1,87 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from wysteria import errors
+from wysteria.middleware import deadline
+from wysteria.middleware import impl_nats
+
+
+class _AuthError(Exception):
+    pass
+
+
+def _failing_client(error: Exception):
+    """Return a fake nats client class whose connect() raises the given error"""
+    class Client:
+        async def connect(self, **kwargs):
+            raise error
+
+    return Client
+
+
+async def _in_order(servers):
+    return servers, {}
+
+
+class TestAsyncIONats:
+    """Tests for the NATS connection, without a server"""
+
+    def _connect(self, monkeypatch, error: Exception) -> impl_nats._AsyncIONats:
+        """Run a connection whose connect fails with the given error, returning it"""
+        monkeypatch.setattr(impl_nats, "NatsClient", _failing_client(error))
+        monkeypatch.setattr(impl_nats, "_order_by_rtt", _in_order)
+        conn = impl_nats._AsyncIONats(["nats://localhost:4222"], None)
+
+        loop = asyncio.new_event_loop()
+        try:
+            with pytest.raises(Exception):
+                loop.run_until_complete(conn.main(loop))
+        finally:
+            loop.close()
+        return conn
+
+    def test_unreachable_servers_are_raised_to_requests(self, monkeypatch):
+        # arrange
+        conn = self._connect(monkeypatch, ConnectionRefusedError("refused"))
+
+        # act & assert
+        with pytest.raises(errors.NoServersError):
+            conn.submit(b"{}", "key", timeout=1)
+
+    def test_other_connect_errors_are_raised_to_requests(self, monkeypatch):
+        # arrange
+        error = _AuthError("authorization violation")
+        conn = self._connect(monkeypatch, error)
+
+        # act & assert
+        with pytest.raises(_AuthError) as raised:
+            conn.submit(b"{}", "key", timeout=1)
+        assert raised.value is error
+
+    def _silent(self, monkeypatch) -> impl_nats._AsyncIONats:
+        """Return a connection whose requests never get a reply"""
+        conn = impl_nats._AsyncIONats(["nats://localhost:4222"], None)
+        monkeypatch.setattr(
+            conn, "submit", lambda data, key, timeout=5: concurrent.futures.Future()
+        )
+        return conn
+
+    def test_request_running_out_of_deadline_raises_deadline_exceeded(self, monkeypatch):
+        # arrange
+        conn = self._silent(monkeypatch)
+
+        # act & assert
+        with pytest.raises(errors.DeadlineExceededError):
+            with deadline.within(0.05):
+                conn.request(b"{}", "key", timeout=deadline.timeout(5))
+
+    def test_request_running_out_of_timeout_raises_request_timeout(self, monkeypatch):
+        # arrange
+        conn = self._silent(monkeypatch)
+
+        # act & assert
+        with pytest.raises(errors.RequestTimeoutError) as raised:
+            conn.request(b"{}", "key", timeout=0.05)
+        assert not isinstance(raised.value, errors.DeadlineExceededError)
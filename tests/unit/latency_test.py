@@ -0,0 +1,261 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from wysteria import errors
+from wysteria.middleware import impl_grpc
+from wysteria.middleware import latency
+from wysteria.middleware import priority
+
+
+def _observe(tracker, subject: str, seconds: float, count: int=32):
+    """Record count requests to the subject that each took the given seconds"""
+    for _ in range(count):
+        tracker.observe(subject, seconds)
+
+
+class TestRequestPolicy:
+    """Tests for adaptive timeouts & retries"""
+
+    def test_default_timeout_is_used_until_enough_requests_are_seen(self):
+        # arrange
+        policy = latency.RequestPolicy()
+        _observe(policy, "find", 0.1, count=5)
+
+        # act
+        timeout = policy.timeout("find", 3)
+
+        # assert
+        assert timeout == 3
+
+    def test_timeout_follows_observed_latency_within_bounds(self):
+        # arrange
+        policy = latency.RequestPolicy(min_timeout=0.5, max_timeout=10)
+        _observe(policy, "fast", 0.01)
+        _observe(policy, "medium", 1)
+        _observe(policy, "slow", 100)
+
+        # act
+        timeouts = [policy.timeout(s, 0.1) for s in ("fast", "medium", "slow")]
+
+        # assert
+        assert timeouts == [0.5, 3, 10]
+
+    def test_timeout_is_never_shorter_than_the_default(self):
+        # arrange
+        policy = latency.RequestPolicy(min_timeout=0.5)
+        _observe(policy, "find", 0.01)
+
+        # act
+        timeout = policy.timeout("find", 3)
+
+        # assert
+        assert timeout == 3
+
+    def test_timed_out_requests_raise_the_timeout(self):
+        # arrange
+        policy = latency.RequestPolicy(min_timeout=0.5, max_timeout=60)
+        _observe(policy, "find", 0.01)
+        before = policy.timeout("find", 0.1)
+
+        # act
+        for _ in range(32):
+            policy.timed_out("find", before)
+        after = policy.timeout("find", 0.1)
+
+        # assert
+        assert before == 0.5
+        assert after == 1.5
+
+    def test_timeout_doubles_on_each_retry_up_to_the_max(self):
+        # arrange
+        policy = latency.RequestPolicy(max_timeout=10)
+
+        # act
+        timeouts = [policy.timeout("find", 3, attempt) for attempt in range(4)]
+
+        # assert
+        assert timeouts == [3, 6, 10, 10]
+
+    def test_finds_of_different_sizes_get_their_own_timeout(self):
+        # arrange
+        policy = latency.RequestPolicy(min_timeout=0.5, max_timeout=60)
+        _observe(policy, latency.sized("find", 1), 0.01)
+        _observe(policy, latency.sized("find", 1000), 5)
+
+        # act
+        small = policy.timeout(latency.sized("find", 1), 0.1)
+        large = policy.timeout(latency.sized("find", 500), 0.1)
+
+        # assert
+        assert small == 0.5
+        assert large == 15
+
+    def test_sized_buckets_by_limit(self):
+        # act
+        subjects = [latency.sized("find", n) for n in (1, 5, 10, 11, 1000, 1001, 0)]
+
+        # assert
+        assert subjects == [
+            "find[1]", "find[10]", "find[10]", "find[100]", "find[1000]", "find[*]", "find[*]"
+        ]
+
+    def test_retries_stop_when_the_budget_is_spent(self):
+        # arrange
+        policy = latency.RequestPolicy(retries=100)
+
+        # act
+        delays = [policy.retry_delay(0) for _ in range(10)]
+
+        # assert
+        assert all(d is not None for d in delays[:4])
+        assert delays[-1] is None
+
+
+class TestHedger:
+    """Tests for hedging slow requests"""
+
+    def _hedger(self) -> latency.Hedger:
+        """Return a hedger that hedges requests slower than 10ms & can afford to"""
+        tracker = latency.LatencyTracker()
+        _observe(tracker, "find", 0.01)
+        return latency.Hedger(tracker, ratio=1)
+
+    def test_hedge_wins_and_the_slow_request_is_cancelled(self):
+        # arrange
+        hedger = self._hedger()
+        slow = concurrent.futures.Future()
+        fast = concurrent.futures.Future()
+        fast.set_result("hedge")
+        requests = iter([slow, fast])
+
+        # act
+        result = hedger.run(lambda: next(requests), "find", timeout=5)
+
+        # assert
+        assert result == "hedge"
+        assert slow.cancelled()
+        assert hedger.report() == {"requests": 1, "hedges": 1, "wins": 1}
+
+    def test_request_is_not_hedged_without_enough_latencies(self):
+        # arrange
+        hedger = latency.Hedger(latency.LatencyTracker(), ratio=1)
+        sent = []
+
+        def start():
+            future = concurrent.futures.Future()
+            future.set_result("result")
+            sent.append(future)
+            return future
+
+        # act
+        result = hedger.run(start, "find", timeout=5)
+
+        # assert
+        assert result == "result"
+        assert len(sent) == 1
+
+    def test_request_is_kept_if_the_hedge_fails_to_start(self):
+        # arrange
+        hedger = self._hedger()
+        first = concurrent.futures.Future()
+        calls = []
+
+        def start():
+            calls.append(1)
+            if len(calls) > 1:
+                first.set_result("first")
+                raise RuntimeError("no slot free")
+            return first
+
+        # act
+        result = hedger.run(start, "find", timeout=5)
+
+        # assert
+        assert result == "first"
+        assert len(calls) == 2
+
+    def test_hedge_is_skipped_and_refunded_when_no_slot_is_free(self):
+        # arrange
+        hedger = self._hedger()
+        slots = priority.FairSlots(1, {priority.INTERACTIVE: 1})
+        first = concurrent.futures.Future()
+
+        def start():
+            slots.acquire(priority.INTERACTIVE)
+            first.add_done_callback(lambda _: slots.release())
+            return first
+
+        def hedge():
+            if not slots.acquire(priority.INTERACTIVE, timeout=0):
+                first.set_result("first")
+                raise errors.RequestTimeoutError("no slot free")
+            return concurrent.futures.Future()
+
+        # act
+        result = hedger.run(start, "find", timeout=5, hedge=hedge)
+
+        # assert
+        assert result == "first"
+        assert hedger.report() == {"requests": 1, "hedges": 0, "wins": 0}
+        assert hedger._allow()  # the hedge's token was given back
+
+    def test_every_request_is_cancelled_on_timeout(self):
+        # arrange
+        hedger = self._hedger()
+        sent = []
+
+        def start():
+            sent.append(concurrent.futures.Future())
+            return sent[-1]
+
+        # act & assert
+        with pytest.raises(concurrent.futures.TimeoutError):
+            hedger.run(start, "find", timeout=0.1)
+        assert len(sent) == 2
+        assert all(f.cancelled() for f in sent)
+
+    def test_async_hedge_wins_and_the_slow_request_is_cancelled(self):
+        # arrange
+        hedger = self._hedger()
+        sent = []
+
+        async def slow():
+            await asyncio.sleep(5)
+            return "original"
+
+        async def fast():
+            return "hedge"
+
+        def start():
+            sent.append(asyncio.ensure_future(slow() if not sent else fast()))
+            return sent[-1]
+
+        async def run():
+            result = await hedger.run_async(start, "find", timeout=5)
+            await asyncio.sleep(0)  # let the cancellation land
+            return result
+
+        # act
+        result = asyncio.run(run())
+
+        # assert
+        assert result == "hedge"
+        assert sent[0].cancelled()
+
+
+class TestGRPCHedgeSlot:
+    """Tests for the gRPC middleware sending hedges only when a slot is free"""
+
+    def test_hedge_does_not_wait_for_a_slot(self):
+        # arrange
+        conn = impl_grpc.GRPCMiddleware(url="localhost:31000", max_in_flight=1)
+        slot = conn._acquire_slot(None)
+
+        # act & assert
+        try:
+            with pytest.raises(errors.RequestTimeoutError):
+                conn._future("FindItems", None, None, wait=False)
+        finally:
+            conn._release_slot(slot)
@@ -0,0 +1,142 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from wysteria.middleware import priority
+
+
+def _wait_for(condition, timeout: float=5):
+    """Wait until condition() is true
+
+    Args:
+        condition: function () -> bool
+        timeout: seconds to wait before failing the test
+    """
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out waiting"
+        time.sleep(0.001)
+
+
+class TestLane:
+    """Tests for setting the priority lane"""
+
+    def test_lane_applies_within_the_block(self):
+        # act
+        with priority.lane(priority.BULK):
+            inside = priority.current()
+        outside = priority.current()
+
+        # assert
+        assert inside == priority.BULK
+        assert outside == priority.INTERACTIVE
+
+    def test_unknown_lane_raises(self):
+        # act & assert
+        with pytest.raises(ValueError):
+            with priority.lane("urgent"):
+                pass
+
+
+class TestFairSlots:
+    """Tests for weighted fair sharing of slots"""
+
+    def test_free_slot_is_taken_at_once(self):
+        # arrange
+        slots = priority.FairSlots(1, {priority.INTERACTIVE: 4, priority.BULK: 1})
+
+        # act
+        taken = slots.acquire(priority.BULK, timeout=0)
+
+        # assert
+        assert taken
+
+    def test_caller_gives_up_when_no_slot_is_free_in_time(self):
+        # arrange
+        slots = priority.FairSlots(1, {priority.INTERACTIVE: 4, priority.BULK: 1})
+        slots.acquire(priority.BULK)
+
+        # act
+        taken = slots.acquire(priority.INTERACTIVE, timeout=0.05)
+
+        # assert
+        assert not taken
+        assert slots.waiting == {priority.INTERACTIVE: 0, priority.BULK: 0}
+
+    def test_freed_slots_are_shared_by_weight(self):
+        # arrange
+        slots = priority.FairSlots(1, {priority.INTERACTIVE: 4, priority.BULK: 1})
+        slots.acquire(priority.BULK)
+        granted = []
+        lock = threading.Lock()
+
+        def wait(name):
+            assert slots.acquire(name, timeout=5)
+            with lock:
+                granted.append(name)
+
+        pool = concurrent.futures.ThreadPoolExecutor(10)
+        for name in [priority.INTERACTIVE, priority.BULK] * 5:
+            pool.submit(wait, name)
+        _wait_for(lambda: slots.waiting == {priority.INTERACTIVE: 5, priority.BULK: 5})
+
+        # act
+        for i in range(5):
+            slots.release()
+            _wait_for(lambda: len(granted) == i + 1)
+        for _ in range(5):
+            slots.release()
+        pool.shutdown()
+
+        # assert
+        assert granted[:5].count(priority.INTERACTIVE) == 4
+        assert len(granted) == 10
+
+
+class TestReservedSlots:
+    """Tests for slots kept back for interactive requests"""
+
+    def test_bulk_requests_cannot_take_reserved_slots(self):
+        # arrange
+        slots = priority.ReservedSlots(4, reserved=1)
+        taken = [slots.acquire(priority.BULK, timeout=0) for _ in range(3)]
+
+        # act
+        bulk = slots.acquire(priority.BULK, timeout=0.05)
+        interactive = slots.acquire(priority.INTERACTIVE, timeout=0.05)
+
+        # assert
+        assert taken == [False, False, False]
+        assert bulk is None
+        assert interactive is True
+
+    def test_released_reserved_slot_is_kept_for_interactive_requests(self):
+        # arrange
+        slots = priority.ReservedSlots(2, reserved=1)
+        shared = slots.acquire(priority.BULK, timeout=0)
+        reserved = slots.acquire(priority.INTERACTIVE, timeout=0)
+
+        # act
+        slots.release(reserved)
+        bulk = slots.acquire(priority.BULK, timeout=0.05)
+
+        # assert
+        assert shared is False
+        assert bulk is None
+
+    def test_waiting_bulk_request_gets_a_freed_shared_slot(self):
+        # arrange
+        slots = priority.ReservedSlots(2, reserved=1)
+        shared = slots.acquire(priority.BULK, timeout=0)
+        pool = concurrent.futures.ThreadPoolExecutor(1)
+        waiting = pool.submit(slots.acquire, priority.BULK, 5)
+        _wait_for(lambda: slots.waiting[priority.BULK] == 1)
+
+        # act
+        slots.release(shared)
+
+        # assert
+        assert waiting.result(5) is False
+        pool.shutdown()
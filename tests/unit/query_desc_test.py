@@ -0,0 +1,32 @@
+from wysteria import domain
+
+
+class TestQueryDesc:
+    """Tests for query descriptions"""
+
+    def test_key_is_equal_for_queries_with_the_same_params(self):
+        # arrange
+        a = domain.QueryDesc().name("a").has_facets(x="1", y="2")
+        b = domain.QueryDesc().has_facets(y="2", x="1").name("a")
+
+        # act & assert
+        assert a.key == b.key
+
+    def test_key_differs_for_facet_values_of_different_types(self):
+        # arrange
+        number = domain.QueryDesc().has_facets(v=1)
+        string = domain.QueryDesc().has_facets(v="1")
+
+        # act & assert
+        assert number.key != string.key
+
+    def test_key_changes_when_a_param_is_set(self):
+        # arrange
+        query = domain.QueryDesc().name("a")
+        before = query.key
+
+        # act
+        query.name("b")
+
+        # assert
+        assert query.key != before
@@ -0,0 +1,117 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from wysteria import errors
+from wysteria.middleware import deadline
+from wysteria.middleware import singleflight
+
+
+_WAITERS = 4
+
+
+def _wait_for(condition, timeout: float=5):
+    """Wait until condition() is true
+
+    Args:
+        condition: function () -> bool
+        timeout: seconds to wait before failing the test
+    """
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out waiting"
+        time.sleep(0.001)
+
+
+class TestSingleflight:
+    """Tests for coalescing identical calls"""
+
+    def _concurrent(self, flights, fn) -> list:
+        """Call fn through flights from a leader & several waiters, returning their futures
+
+        fn is held in flight until every waiter has joined it.
+        """
+        release = threading.Event()
+        started = threading.Event()
+
+        def held():
+            started.set()
+            release.wait(5)
+            return fn()
+
+        pool = concurrent.futures.ThreadPoolExecutor(_WAITERS + 1)
+        futures = [pool.submit(flights.do, "key", held)]
+        started.wait(5)
+        futures += [pool.submit(flights.do, "key", held) for _ in range(_WAITERS)]
+        _wait_for(lambda: flights.collapsed == _WAITERS)
+        release.set()
+        pool.shutdown()
+        return futures
+
+    def test_concurrent_calls_share_one_call(self):
+        # arrange
+        flights = singleflight.Singleflight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return "result"
+
+        # act
+        futures = self._concurrent(flights, fn)
+
+        # assert
+        assert [f.result() for f in futures] == ["result"] * (_WAITERS + 1)
+        assert len(calls) == 1
+        assert flights.report() == {"calls": _WAITERS + 1, "collapsed": _WAITERS}
+
+    def test_error_is_raised_to_every_caller(self):
+        # arrange
+        flights = singleflight.Singleflight()
+
+        def fn():
+            raise ValueError("failed")
+
+        # act
+        futures = self._concurrent(flights, fn)
+
+        # assert
+        for f in futures:
+            with pytest.raises(ValueError):
+                f.result()
+
+    def test_calls_after_one_finishes_are_sent_again(self):
+        # arrange
+        flights = singleflight.Singleflight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return len(calls)
+
+        # act
+        first = flights.do("key", fn)
+        second = flights.do("key", fn)
+
+        # assert
+        assert (first, second) == (1, 2)
+
+    def test_waiter_honours_its_own_deadline(self):
+        # arrange
+        flights = singleflight.Singleflight()
+        release = threading.Event()
+        pool = concurrent.futures.ThreadPoolExecutor(1)
+        leader = pool.submit(flights.do, "key", lambda: release.wait(5))
+        _wait_for(lambda: flights.calls == 1)
+
+        # act & assert
+        try:
+            with pytest.raises(errors.DeadlineExceededError):
+                with deadline.within(0.05):
+                    flights.do("key", lambda: "result")
+        finally:
+            release.set()
+            leader.result()
+            pool.shutdown()
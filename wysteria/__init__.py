@@ -5,10 +5,14 @@ server.
 Files:
 ------
 
+- cache.py
+    client side caches of wysteria objects
 - client.py
     high level class that wraps a middleware connection & adds some helpful functions.
 - constants.py
     various constants used
+- disk_cache.py
+    persistent cache of wysteria objects shared by processes on a host
 - errors.py
     contains various exceptions that can be raised
 - search.py
@@ -54,6 +58,8 @@ from wysteria.constants import FACET_ITEM_VARIANT
 from wysteria.constants import FACET_LINK_TYPE
 from wysteria.constants import VALUE_LINK_TYPE_VERSION
 from wysteria.constants import VALUE_LINK_TYPE_ITEM
+from wysteria.constants import PRIORITY_INTERACTIVE
+from wysteria.constants import PRIORITY_BULK
 from wysteria.utils import default_client
 from wysteria.utils import from_config
 
@@ -69,4 +75,6 @@ __all__ = [
     "FACET_LINK_TYPE",
     "VALUE_LINK_TYPE_VERSION",
     "VALUE_LINK_TYPE_ITEM",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BULK",
 ]
@@ -0,0 +1,615 @@
+"""Client side caches of wysteria objects.
+
+ObjectCache maps object ids to the objects themselves, so everyone asking for the same
+object (eg. the parent of 10k versions of one item) is handed the same instance & only the
+first ask goes to the server. It's shared by a Client, its middleware & the domain objects
+the middleware returns. Writes made through the middleware drop the objects they change.
+
+QueryCache (opt in) keeps the results of find queries, so the same search run over & over
+goes to the server once. Any write made through the middleware clears it.
+
+PublishedCache maps item ids to their published version, so "what's published" checks for
+the same items are memory lookups. Publishing through the middleware updates it at once.
+
+NegativeCache remembers lookups that found nothing (no such object, no published version)
+for a few seconds, so tools polling for things that don't exist yet don't hammer the server.
+Creating or publishing anything through the middleware drops what it may affect.
+"""
+import collections
+import threading
+import time
+
+
+_DEFAULT_SIZE = 10000  # objects kept
+
+_DEFAULT_QUERY_BYTES = 64 * 1024 * 1024  # estimated size of the results kept
+_DEFAULT_QUERY_TTL = 30  # seconds
+
+_DEFAULT_PUBLISHED_SIZE = 10000  # items kept
+_DEFAULT_PUBLISHED_TTL = 10  # seconds, other clients may publish underneath us
+
+_DEFAULT_NEGATIVE_SIZE = 10000  # lookups kept
+_DEFAULT_NEGATIVE_TTL = 5  # seconds, other clients may create what we're looking for
+
+NEGATIVE_OBJECT = "object"  # namespaces of NegativeCache keys
+NEGATIVE_PUBLISHED = "published"
+NEGATIVE_COLLECTION = "collection"  # collections looked up by id, name or uri
+
+# seconds an object is trusted for, by type. Other clients may change facets underneath us.
+_DEFAULT_TTL = {
+    "collection": 300,
+    "item": 300,
+    "version": 60,
+    "resource": 60,
+    "link": 60,
+}
+
+
+class ObjectCache:
+    """Thread safe, size bounded identity map of object id -> object.
+
+    The least recently used objects are evicted first & objects expire after the TTL of
+    their type.
+    """
+    def __init__(self, size: int=_DEFAULT_SIZE, ttl: dict=None):
+        """
+
+        Args:
+            size: max number of objects to keep
+            ttl: type name (eg. "item") -> seconds objects of the type are kept
+        """
+        self._size = size
+        self._ttl = dict(_DEFAULT_TTL)
+        self._ttl.update(ttl or {})
+        self._objects = collections.OrderedDict()  # id -> (expires at, object)
+        self._generation = 0  # bumped by invalidate(), so fetches racing a write aren't kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def _ttl_of(self, obj) -> float:
+        for cls in type(obj).__mro__:
+            ttl = self._ttl.get(cls.__name__.lower())
+            if ttl is not None:
+                return ttl
+        return 0
+
+    def get(self, oid: str, fetch):
+        """Return the object with the given id, fetching it if we don't have it.
+
+        Args:
+            oid: id of the object
+            fetch: function () -> object or None, called (outside of our lock) on a miss
+
+        Returns:
+            domain object or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._objects.get(oid)
+            if entry is not None:
+                if entry[0] > now:
+                    self._objects.move_to_end(oid)
+                    self.hits += 1
+                    return entry[1]
+                del self._objects[oid]
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+
+        obj = fetch()
+        if obj is not None:
+            self.put(obj, generation)
+        return obj
+
+    def peek(self, oid: str):
+        """Return the object with the given id if we have it, without counting a hit or miss.
+
+        Args:
+            oid: id of the object
+
+        Returns:
+            domain object or None
+        """
+        with self._lock:
+            entry = self._objects.get(oid)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, obj, generation: int=None):
+        """Add an object, replacing any we have with the same id.
+
+        Args:
+            obj: domain object
+            generation: value of `generation` when the object was fetched, it's dropped if
+                anything has been invalidated since
+        """
+        ttl = self._ttl_of(obj)
+        if not obj.id or self._size <= 0 or ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # a write happened while the object was being fetched
+            self._objects[obj.id] = (time.monotonic() + ttl, obj)
+            self._objects.move_to_end(obj.id)
+            while len(self._objects) > self._size:
+                self._objects.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, oid: str):
+        """Drop the object with the given id, if we have it.
+
+        Args:
+            oid: id of the object
+        """
+        with self._lock:
+            self._generation += 1
+            self._objects.pop(oid, None)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._objects.clear()
+
+    @property
+    def stats(self) -> dict:
+        """Return hits, misses, evictions, expirations & the number of objects held.
+
+        Returns:
+            dict
+        """
+        return {
+            "size": len(self._objects),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _estimate(value) -> int:
+    """Return a rough size in bytes of some find results.
+
+    Args:
+        value: result(s) of a find, domain objects or dicts
+
+    Returns:
+        int
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_estimate(k) + _estimate(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate(v) for v in value)
+
+    msg = getattr(value, "_msg", None)  # lazy objects, don't decode them to size them
+    if msg is not None:
+        return msg.ByteSize()
+    if hasattr(value, "_encode"):
+        return _estimate(value._encode())
+    return 8
+
+
+class QueryCache:
+    """Thread safe cache of find results, bounded by entry count & estimated bytes.
+
+    The least recently used results are evicted first & results expire after `ttl` seconds.
+    """
+    def __init__(
+        self, size: int, max_bytes: int=_DEFAULT_QUERY_BYTES, ttl: float=_DEFAULT_QUERY_TTL
+    ):
+        """
+
+        Args:
+            size: max number of results kept
+            max_bytes: max estimated size of the results kept
+            ttl: seconds results are kept
+        """
+        self._size = size
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._results = collections.OrderedDict()  # key -> (expires at, bytes, results)
+        self._bytes = 0
+        self._generation = 0  # bumped by clear(), so finds racing a write aren't kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    @staticmethod
+    def key(kind: str, query: list, limit: int, offset: int) -> tuple:
+        """Return the key of a find query, the same whatever the order of the QueryDescs.
+
+        Args:
+            kind: type of object (or route) searched for
+            query: []domain.QueryDesc
+            limit:
+            offset:
+
+        Returns:
+            tuple
+        """
+        return kind, limit, offset, frozenset(q.key for q in query if q.is_valid)
+
+    def _drop(self, key):
+        _, size, _ = self._results.pop(key)
+        self._bytes -= size
+
+    def get(self, key: tuple, find) -> list:
+        """Return the results of a query, running it if we don't have them.
+
+        Args:
+            key: key of the query (see key())
+            find: function () -> list, runs the query (outside of our lock) on a miss
+
+        Returns:
+            list
+        """
+        generation = self._generation
+        results = self.lookup(key)
+        if results is None:
+            results = find()
+            self.put(key, results, generation)
+        return results
+
+    def lookup(self, key: tuple):
+        """Return the results of a query if we have them.
+
+        Args:
+            key: key of the query (see key())
+
+        Returns:
+            list or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[2])
+                self._drop(key)
+                self.expirations += 1
+            self.misses += 1
+        return None
+
+    def put(self, key: tuple, results: list, generation: int=None):
+        """Keep the results of a query.
+
+        Args:
+            key: key of the query (see key())
+            results: what the query returned
+            generation: value of `generation` when the query was sent, the results are
+                dropped if we've been cleared since
+        """
+        size = _estimate(results)
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # a write happened while the query was in flight
+            if key in self._results:
+                self._drop(key)
+
+            self._results[key] = (time.monotonic() + self._ttl, size, list(results))
+            self._bytes += size
+            while len(self._results) > self._size or self._bytes > self._max_bytes:
+                self._drop(next(iter(self._results)))
+                self.evictions += 1
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    @property
+    def stats(self) -> dict:
+        """Return hits, misses, evictions, expirations, the number of results held & their
+        estimated size in bytes.
+
+        Returns:
+            dict
+        """
+        return {
+            "size": len(self._results),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class PublishedCache:
+    """Thread safe, size bounded cache of item id -> published version.
+
+    The least recently used items are evicted first & entries expire after `ttl` seconds.
+    Lookups of items with no published version aren't kept, that's NegativeCache's job.
+    """
+    def __init__(self, size: int=_DEFAULT_PUBLISHED_SIZE, ttl: float=_DEFAULT_PUBLISHED_TTL):
+        """
+
+        Args:
+            size: max number of items kept
+            ttl: seconds an item's published version is trusted for
+        """
+        self._size = size
+        self._ttl = ttl
+        self._items = collections.OrderedDict()  # item id -> (expires at, version or None)
+        self._item_of = {}  # version id -> item id, for the versions we hold
+        self._generation = 0  # bumped by writes, so lookups racing a publish aren't kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _drop(self, item_id: str):
+        _, version = self._items.pop(item_id)
+        if version is not None:
+            self._item_of.pop(version.id, None)
+
+    def get(self, item_id: str, fetch):
+        """Return the published version of an item, fetching it if we don't have it.
+
+        Args:
+            item_id: id of the item
+            fetch: function () -> version or None, called (outside of our lock) on a miss
+
+        Returns:
+            domain.Version or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(item_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._items.move_to_end(item_id)
+                    self.hits += 1
+                    return entry[1]
+                self._drop(item_id)
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+
+        version = fetch()
+        if version is not None:
+            self._store(item_id, version, generation)
+        return version
+
+    def _store(self, item_id: str, version, generation: int=None):
+        if not item_id or self._size <= 0 or self._ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # something was published while we were asking
+            if item_id in self._items:
+                self._drop(item_id)
+
+            self._items[item_id] = (time.monotonic() + self._ttl, version)
+            if version is not None:
+                self._item_of[version.id] = item_id
+            while len(self._items) > self._size:
+                self._drop(next(iter(self._items)))
+                self.evictions += 1
+
+    def put(self, item_id: str, version):
+        """Record the published version of an item, eg. because we've just published it.
+
+        Args:
+            item_id: id of the item
+            version: domain.Version or None
+        """
+        with self._lock:
+            self._generation += 1
+        self._store(item_id, version)
+
+    def invalidate(self, oid: str):
+        """Drop what we have for the item, or the version, with the given id.
+
+        Args:
+            oid: id of an item or version
+        """
+        with self._lock:
+            self._generation += 1
+            item_id = self._item_of.get(oid, oid)
+            if item_id in self._items:
+                self._drop(item_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+            self._item_of.clear()
+
+    @property
+    def stats(self) -> dict:
+        """Return hits, misses, evictions, expirations & the number of items held.
+
+        Returns:
+            dict
+        """
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class NegativeCache:
+    """Thread safe, size bounded set of lookups that found nothing.
+
+    The least recently used lookups are evicted first & lookups expire after `ttl` seconds.
+    Keys are (namespace, key of the positive entry), eg. ("object", oid).
+    """
+    def __init__(self, size: int=_DEFAULT_NEGATIVE_SIZE, ttl: float=_DEFAULT_NEGATIVE_TTL):
+        """
+
+        Args:
+            size: max number of lookups kept
+            ttl: seconds a lookup that found nothing is trusted for
+        """
+        self._size = size
+        self._ttl = ttl
+        self._keys = collections.OrderedDict()  # key -> expires at
+        self._generation = 0  # bumped by writes, so lookups racing a create aren't kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key: tuple, fetch):
+        """Return None if the lookup recently found nothing, otherwise run it.
+
+        Args:
+            key: (namespace, key)
+            fetch: function () -> result or None, called (outside of our lock) on a miss
+
+        Returns:
+            result or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            expires = self._keys.get(key)
+            if expires is not None:
+                if expires > now:
+                    self._keys.move_to_end(key)
+                    self.hits += 1
+                    return None
+                del self._keys[key]
+            self.misses += 1
+            generation = self._generation
+
+        result = fetch()
+        if result is None:
+            self._add(key, generation)
+        return result
+
+    def _add(self, key: tuple, generation: int):
+        if self._size <= 0 or self._ttl <= 0:
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                return  # something was created while we were asking
+            self._keys[key] = time.monotonic() + self._ttl
+            self._keys.move_to_end(key)
+            while len(self._keys) > self._size:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: tuple):
+        """Forget a lookup, eg. because we've just created what it was looking for.
+
+        Args:
+            key: (namespace, key)
+        """
+        with self._lock:
+            self._generation += 1
+            self._keys.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._keys.clear()
+
+    @property
+    def stats(self) -> dict:
+        """Return hits, misses, evictions & the number of lookups held.
+
+        Returns:
+            dict
+        """
+        return {
+            "size": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def fetch_published(conn, item_id: str):
+    """Return the published version of an item, from conn's cache if it has one.
+
+    Args:
+        conn: middleware
+        item_id: id of the item
+
+    Returns:
+        domain.Version or None
+    """
+    fetch = lambda: conn.get_published_version(item_id)
+
+    disk = getattr(conn, "disk_cache", None)
+    if disk is not None:
+        fetch = lambda fetch=fetch: disk.get_published(conn, item_id, fetch)
+
+    negative = getattr(conn, "negative_cache", None)
+    if negative is not None:
+        fetch = lambda fetch=fetch: negative.get((NEGATIVE_PUBLISHED, item_id), fetch)
+
+    cache = getattr(conn, "published_cache", None)
+    if cache is None:
+        return fetch()
+    return cache.get(item_id, fetch)
+
+
+def fetch_one(conn, oid: str, find):
+    """Return the object with the given id, from conn's cache if it has one.
+
+    Args:
+        conn: middleware
+        oid: id of the object
+        find: function () -> []object, asks the server for it
+
+    Returns:
+        domain object or None
+    """
+    def fetch():
+        results = find()
+        return results[0] if results else None
+
+    disk = getattr(conn, "disk_cache", None)
+    if disk is not None:
+        fetch = lambda fetch=fetch: disk.get(conn, oid, fetch)
+
+    negative = getattr(conn, "negative_cache", None)
+    if negative is not None:
+        fetch = lambda fetch=fetch: negative.get((NEGATIVE_OBJECT, oid), fetch)
+
+    cache = getattr(conn, "cache", None)
+    if cache is None:
+        return fetch()
+    return cache.get(oid, fetch)
@@ -1,10 +1,16 @@
 """
 
 """
+import concurrent.futures
+import contextvars
 from copy import copy
 
 from wysteria.middleware import NatsMiddleware
 from wysteria.middleware import GRPCMiddleware
+from wysteria.middleware import deadline
+from wysteria.middleware import priority
+from wysteria import cache
+from wysteria import disk_cache
 from wysteria import constants as consts
 from wysteria.errors import UnknownMiddlewareError
 from wysteria.domain import Collection, QueryDesc
@@ -18,6 +24,20 @@ _AVAILABLE_MIDDLEWARES = {
     _KEY_MIDDLEWARE_GRPC: GRPCMiddleware,
 }
 _DEFAULT_MIDDLEWARE = _KEY_MIDDLEWARE_GRPC
+_DEFAULT_WORKERS = 16  # requests in flight at once for bulk calls
+_DEFAULT_CHUNK_SIZE = 200  # ids per find in bulk calls, keeps replies under message limits
+
+
+class Results(list):
+    """Objects fetched by id, in the order of the ids asked for with None for ids that
+    weren't found.
+
+    Attributes:
+        missing ([]str): ids that weren't found, in the order asked for
+    """
+    def __init__(self, objects: list, missing: list):
+        super().__init__(objects)
+        self.missing = missing
 
 
 class Client:
@@ -29,20 +49,75 @@ class Client:
 
     """
 
-    def __init__(self, url=None, middleware=_KEY_MIDDLEWARE_NATS, tls=None):
+    def __init__(
+        self,
+        url=None,
+        middleware=_KEY_MIDDLEWARE_NATS,
+        tls=None,
+        cache_size=0,
+        cache_ttl=None,
+        query_cache_size=0,
+        query_cache_bytes=cache._DEFAULT_QUERY_BYTES,
+        query_cache_ttl=cache._DEFAULT_QUERY_TTL,
+        published_cache_size=cache._DEFAULT_PUBLISHED_SIZE,
+        published_cache_ttl=cache._DEFAULT_PUBLISHED_TTL,
+        disk_cache_dir=None,
+        disk_cache_ttl=None,
+        negative_cache_size=0,
+        negative_cache_ttl=cache._DEFAULT_NEGATIVE_TTL,
+        **kwargs
+    ):
         """
 
         Args:
             url (str):
             middleware (str): the name of an available middleware
             tls: a named tuple of our tls options (see utils.py)
+            cache_size (int): max objects to cache, 0 (the default) to turn the object cache
+                off
+            cache_ttl (dict): type name (eg. "item") -> seconds objects of that type are
+                cached for, see wysteria.cache for the defaults
+            query_cache_size (int): max find results to cache, 0 (the default) to turn the
+                query cache off
+            query_cache_bytes (int): max estimated size in bytes of the find results cached
+            query_cache_ttl (float): seconds find results are cached for
+            published_cache_size (int): max items whose published version is cached, 0 to
+                turn the published version cache off
+            published_cache_ttl (float): seconds an item's published version is cached for
+            disk_cache_dir (str): if set, keep objects in a database in this directory
+                shared by every process using it, see wysteria.disk_cache
+            disk_cache_ttl (dict): type name (eg. "item", or "published") -> seconds
+                entries of the disk cache are trusted for
+            negative_cache_size (int): max lookups that found nothing to remember, 0 (the
+                default) to turn the negative cache off
+            negative_cache_ttl (float): seconds a lookup that found nothing is remembered for
+            **kwargs: extra options passed on to the middleware (see the middleware class)
 
         """
         cls = _AVAILABLE_MIDDLEWARES.get(middleware.lower())
         if not cls:
             raise UnknownMiddlewareError("Unknown middleware '%s'" % middleware)
 
-        self._conn = cls(url=url, tls=tls)
+        self._conn = cls(url=url, tls=tls, **kwargs)
+        self._conn.cache = cache.ObjectCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._conn.query_cache = None
+        if query_cache_size > 0:
+            self._conn.query_cache = cache.QueryCache(
+                query_cache_size, query_cache_bytes, query_cache_ttl
+            )
+        self._conn.published_cache = None
+        if published_cache_size > 0:
+            self._conn.published_cache = cache.PublishedCache(
+                published_cache_size, published_cache_ttl
+            )
+        self._conn.disk_cache = None
+        if disk_cache_dir:
+            self._conn.disk_cache = disk_cache.DiskCache(disk_cache_dir, url, disk_cache_ttl)
+        self._conn.negative_cache = None
+        if negative_cache_size > 0:
+            self._conn.negative_cache = cache.NegativeCache(
+                negative_cache_size, negative_cache_ttl
+            )
 
     def connect(self):
         """Connect to wysteria - used if you do not wish to use 'with'
@@ -65,6 +140,64 @@ class Client:
         """Close connection(s) to remote host"""
         self.close()
 
+    @staticmethod
+    def priority(lane: str):
+        """Send requests made by this thread within a `with` block in the given priority lane.
+
+        Requests are interactive by default, batch jobs sharing a process with interactive
+        tools should send theirs as bulk so they don't hold up everyone else
+
+            with client.priority(wysteria.PRIORITY_BULK):
+                ...
+
+        Args:
+            lane (str): PRIORITY_INTERACTIVE or PRIORITY_BULK
+
+        Returns:
+            context manager
+        """
+        return priority.lane(lane)
+
+    @staticmethod
+    def deadline(seconds: float):
+        """Requests made by this thread within a `with` block must finish in the given time.
+
+        The deadline covers every request made in the block, including all the round trips
+        of domain helpers like Version.get_linked(). Requests are given no longer than the
+        time remaining & once the deadline passes a DeadlineExceededError is raised. It can
+        also decorate a function, giving each call of it the time allowed.
+
+            with client.deadline(5):
+                version.get_linked()
+
+        Args:
+            seconds (float): time allowed
+
+        Returns:
+            context manager
+        """
+        return deadline.within(seconds)
+
+    @property
+    def cache_stats(self) -> dict:
+        """Return hit, miss & eviction counts of our caches.
+
+        Returns:
+            dict
+        """
+        stats = {}
+        if self._conn.cache is not None:
+            stats["objects"] = self._conn.cache.stats
+        if self._conn.query_cache is not None:
+            stats["queries"] = self._conn.query_cache.stats
+        if self._conn.published_cache is not None:
+            stats["published"] = self._conn.published_cache.stats
+        if self._conn.disk_cache is not None:
+            stats["disk"] = self._conn.disk_cache.stats
+        if self._conn.negative_cache is not None:
+            stats["negative"] = self._conn.negative_cache.stats
+        return stats
+
     def search(self):
         """Start a new search
 
@@ -122,14 +255,35 @@ class Client:
         Returns:
             domain.Collection or None
         """
-        result = self._conn.find_collections([
-            QueryDesc().id(identifier),
-            QueryDesc().name(identifier),
-            QueryDesc().uri(identifier),
-        ], limit=2)
-        if (not result) or len(result) > 1:
-            return None
-        return result[0]
+        # the identifier may be a name or uri, so only an object cache hit (by id) is trusted
+        # & what we find is cached under its id
+        memory = self._conn.cache
+        if memory is not None:
+            found = memory.peek(identifier)
+            if found is not None:
+                return found
+            generation = memory.generation
+
+        def find():
+            result = self._conn.find_collections([
+                QueryDesc().id(identifier),
+                QueryDesc().name(identifier),
+                QueryDesc().uri(identifier),
+            ], limit=2)
+            if (not result) or len(result) > 1:
+                return None
+            return result[0]
+
+        negative = self._conn.negative_cache
+        if negative is None:
+            found = find()
+        else:
+            # creating anything clears the negative cache (see the middleware _invalidate)
+            found = negative.get((cache.NEGATIVE_COLLECTION, identifier), find)
+
+        if found is not None and memory is not None:
+            memory.put(found, generation)
+        return found
 
     def get_item(self, item_id):
         """Find & return an item by its ID
@@ -140,9 +294,174 @@ class Client:
         Returns:
             domain.Item or None
         """
-        result = self._conn.find_items([
-            QueryDesc().id(item_id),
-        ], limit=1)
-        if not result:
-            return None
-        return result[0]
+        return cache.fetch_one(
+            self._conn,
+            item_id,
+            lambda: self._conn.find_items([QueryDesc().id(item_id)], limit=1),
+        )
+
+    def warm_published(self, item_ids: list, workers: int=_DEFAULT_WORKERS) -> dict:
+        """Fetch the published versions of the given items, several at a time.
+
+        Later checks of what's published for these items (eg. Item.get_published()) are
+        then answered from memory until the published version cache expires them.
+
+        Args:
+            item_ids ([]str): ids of items
+            workers (int): max requests in flight at once
+
+        Returns:
+            {str: domain.Version or None} item id -> published version
+        """
+        ids = list(dict.fromkeys(item_ids))
+        if not ids:
+            return {}
+
+        context = contextvars.copy_context()  # keep our priority lane & deadline
+
+        def fetch(item_id):
+            return context.copy().run(cache.fetch_published, self._conn, item_id)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(ids))) as pool:
+            return dict(zip(ids, pool.map(fetch, ids)))
+
+    def _get_many(self, ids: list, find, chunk_size: int, workers: int) -> Results:
+        """Fetch the objects with the given ids, a chunk of ids per find & several finds at
+        a time.
+
+        Args:
+            ids ([]str): ids of objects
+            find: find function of our middleware for the type of object
+            chunk_size (int): max ids asked for per find, capped at DEFAULT_QUERY_LIMIT
+            workers (int): max finds in flight at once
+
+        Returns:
+            Results
+
+        Raises:
+            whatever find raises, a chunk that fails fails the whole call
+        """
+        found = {}
+        wanted = list(dict.fromkeys(oid for oid in ids if oid))
+
+        objects = self._conn.cache
+        if objects is not None:
+            for oid in wanted:
+                obj = objects.peek(oid)
+                if obj is not None:
+                    found[oid] = obj
+            wanted = [oid for oid in wanted if oid not in found]
+
+        generation = objects.generation if objects is not None else None
+        size = max(1, min(chunk_size, consts.DEFAULT_QUERY_LIMIT))
+        chunks = [wanted[i:i + size] for i in range(0, len(wanted), size)]
+        if chunks:
+            context = contextvars.copy_context()  # keep our priority lane & deadline
+
+            def fetch(chunk):
+                query = [QueryDesc().id(oid) for oid in chunk]
+                return context.copy().run(find, query, limit=len(chunk))
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(workers, len(chunks))
+            ) as pool:
+                for results in pool.map(fetch, chunks):
+                    for obj in results:
+                        found[obj.id] = obj
+                        if objects is not None:
+                            objects.put(obj, generation)
+
+        return Results(
+            [found.get(oid) for oid in ids],
+            [oid for oid in dict.fromkeys(ids) if oid and oid not in found],
+        )
+
+    def get_collections(
+        self, ids: list, chunk_size: int=_DEFAULT_CHUNK_SIZE, workers: int=_DEFAULT_WORKERS
+    ) -> Results:
+        """Find & return the collections with the given IDs
+
+        Args:
+            ids ([]str):
+            chunk_size (int): max ids asked for per request
+            workers (int): max requests in flight at once
+
+        Returns:
+            Results of domain.Collection, with the ids that weren't found in `missing`
+
+        Raises:
+            Exception on network / server error, for any chunk of ids
+        """
+        return self._get_many(ids, self._conn.find_collections, chunk_size, workers)
+
+    def get_items(
+        self, ids: list, chunk_size: int=_DEFAULT_CHUNK_SIZE, workers: int=_DEFAULT_WORKERS
+    ) -> Results:
+        """Find & return the items with the given IDs
+
+        Args:
+            ids ([]str):
+            chunk_size (int): max ids asked for per request
+            workers (int): max requests in flight at once
+
+        Returns:
+            Results of domain.Item, with the ids that weren't found in `missing`
+
+        Raises:
+            Exception on network / server error, for any chunk of ids
+        """
+        return self._get_many(ids, self._conn.find_items, chunk_size, workers)
+
+    def get_versions(
+        self, ids: list, chunk_size: int=_DEFAULT_CHUNK_SIZE, workers: int=_DEFAULT_WORKERS
+    ) -> Results:
+        """Find & return the versions with the given IDs
+
+        Args:
+            ids ([]str):
+            chunk_size (int): max ids asked for per request
+            workers (int): max requests in flight at once
+
+        Returns:
+            Results of domain.Version, with the ids that weren't found in `missing`
+
+        Raises:
+            Exception on network / server error, for any chunk of ids
+        """
+        return self._get_many(ids, self._conn.find_versions, chunk_size, workers)
+
+    def get_resources(
+        self, ids: list, chunk_size: int=_DEFAULT_CHUNK_SIZE, workers: int=_DEFAULT_WORKERS
+    ) -> Results:
+        """Find & return the resources with the given IDs
+
+        Args:
+            ids ([]str):
+            chunk_size (int): max ids asked for per request
+            workers (int): max requests in flight at once
+
+        Returns:
+            Results of domain.Resource, with the ids that weren't found in `missing`
+
+        Raises:
+            Exception on network / server error, for any chunk of ids
+        """
+        return self._get_many(ids, self._conn.find_resources, chunk_size, workers)
+
+    def get_links(
+        self, ids: list, chunk_size: int=_DEFAULT_CHUNK_SIZE, workers: int=_DEFAULT_WORKERS
+    ) -> Results:
+        """Find & return the links with the given IDs
+
+        Args:
+            ids ([]str):
+            chunk_size (int): max ids asked for per request
+            workers (int): max requests in flight at once
+
+        Returns:
+            Results of domain.Link, with the ids that weren't found in `missing`
+
+        Raises:
+            Exception on network / server error, for any chunk of ids
+        """
+        return self._get_many(ids, self._conn.find_links, chunk_size, workers)
@@ -11,6 +11,10 @@ VALUE_LINK_TYPE_VERSION = "version"
 # A default for the 'limit' field send to wysteria on a search request.
 DEFAULT_QUERY_LIMIT = 500
 
+# Priority lanes requests may be sent in, see Client.priority
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
 ERR_ALREADY_EXISTS = "already-exists"
 ERR_INVALID = "invalid-input"
 ERR_ILLEGAL = "illegal-operation"
@@ -0,0 +1,347 @@
+"""Persistent cache of wysteria objects, shared by every process on a host.
+
+Render tasks each start a new process, but the tasks on a node mostly resolve the same
+assets. With a DiskCache objects fetched by id, objects returned by finds & items'
+published versions are kept in an SQLite database under a directory of the user's choosing,
+so a new process finds them locally rather than asking the server.
+
+Entries are trusted for a TTL that depends on their type. When the server can't be reached
+expired entries are served rather than failing, up to `max_stale` seconds past their TTL.
+
+The database is opened in WAL mode, so any number of processes (& threads) may read while
+one writes. Errors reading or writing the database are counted & otherwise ignored, the cache
+never stops a request from going to the server.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from wysteria import domain
+from wysteria import errors
+
+
+_DEFAULT_TTL = {  # seconds, by type
+    "collection": 3600,
+    "item": 3600,
+    "version": 600,
+    "resource": 600,
+    "link": 600,
+    "published": 60,
+}
+_DEFAULT_MAX_STALE = 7 * 24 * 3600  # seconds past their TTL entries are served / kept for
+_LOCK_TIMEOUT = 5  # seconds to wait for another process writing the database
+
+_CLASSES = {
+    "collection": domain.Collection,
+    "item": domain.Item,
+    "version": domain.Version,
+    "resource": domain.Resource,
+    "link": domain.Link,
+}
+
+# the server can't be reached, serve what we have. Not DeadlineExceededError (a kind of
+# RequestTimeoutError), that's the caller running out of time.
+_UNREACHABLE = (
+    errors.RequestTimeoutError,
+    errors.NoServersError,
+    errors.ConnectionClosedError,
+    errors.ServerUnavailableError,
+    ConnectionError,
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS objects ("
+    " id TEXT PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL, expires REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS published ("
+    " item TEXT PRIMARY KEY, version TEXT NOT NULL, expires REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS published_version ON published (version)",
+)
+
+
+def _kind(obj) -> str:
+    for kind, cls in _CLASSES.items():
+        if isinstance(obj, cls):
+            return kind
+    return ""
+
+
+def _servers(url) -> str:
+    """Return the servers of a url, the same whatever order they're listed in.
+
+    Args:
+        url: a url, list of urls or comma separated string of urls
+
+    Returns:
+        str
+    """
+    if not url:
+        return ""
+    if isinstance(url, str):
+        url = url.split(",")
+    return ",".join(sorted({u.strip() for u in url if u.strip()}))
+
+
+class DiskCache:
+    """Process & thread safe SQLite cache of domain objects & published versions.
+    """
+    def __init__(
+        self, directory: str, url=None, ttl: dict=None, max_stale: float=_DEFAULT_MAX_STALE
+    ):
+        """
+
+        Args:
+            directory: directory to keep the database in, created if need be
+            url: url of the server(s), a list or comma separated string of urls. Each set
+                of servers gets a database of its own.
+            ttl: type name (eg. "item", or "published") -> seconds entries are trusted for
+            max_stale: seconds past their TTL entries may be served if the server can't
+                be reached
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = hashlib.sha1(_servers(url).encode("utf8")).hexdigest()[:12]
+        self._path = os.path.join(directory, "wysteria-%s.sqlite" % name)
+        self._ttl = dict(_DEFAULT_TTL)
+        self._ttl.update(ttl or {})
+        self._max_stale = max_stale
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+
+        db = self._db()
+        if db is not None:
+            self._execute(db, "DELETE FROM objects WHERE expires < ?", time.time() - max_stale)
+            self._execute(db, "DELETE FROM published WHERE expires < ?", time.time() - max_stale)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _db(self):
+        """Return this thread's connection to the database, opening it if need be.
+
+        Returns:
+            sqlite3.Connection or None if the database can't be opened
+        """
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) == pid:
+            return self._local.db
+
+        # connections can't be shared across threads, nor with a parent process we forked from
+        try:
+            db = sqlite3.connect(self._path, timeout=_LOCK_TIMEOUT, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                db.execute(statement)
+        except sqlite3.Error:
+            self.errors += 1
+            db = None
+
+        self._local.pid = pid
+        self._local.db = db
+        return db
+
+    def _execute(self, db, sql: str, *args) -> list:
+        try:
+            return db.execute(sql, args).fetchall()
+        except sqlite3.Error:
+            self.errors += 1
+            return []
+
+    def _read(self, conn, oid: str, stale: bool):
+        """Return the object with the given id from the database.
+
+        Args:
+            conn: middleware the object uses
+            oid: id of the object
+            stale: return it even if it has expired
+
+        Returns:
+            domain object or None
+        """
+        db = self._db()
+        if db is None or not oid:
+            return None
+
+        rows = self._execute(db, "SELECT kind, data, expires FROM objects WHERE id = ?", oid)
+        if not rows:
+            return None
+
+        kind, data, expires = rows[0]
+        if expires < time.time() and not stale:
+            return None
+        return _CLASSES[kind](conn, **json.loads(data))
+
+    def get(self, conn, oid: str, fetch):
+        """Return the object with the given id, fetching it if we don't have it.
+
+        Args:
+            conn: middleware the object uses
+            oid: id of the object
+            fetch: function () -> object or None, asks the server
+
+        Returns:
+            domain object or None
+        """
+        obj = self._read(conn, oid, False)
+        if obj is not None:
+            self.hits += 1
+            return obj
+
+        self.misses += 1
+        try:
+            obj = fetch()
+        except errors.DeadlineExceededError:
+            raise  # the caller ran out of time, the server may be fine
+        except _UNREACHABLE:
+            obj = self._read(conn, oid, True)
+            if obj is None:
+                raise
+            self.stale_hits += 1
+            return obj
+
+        if obj is not None:
+            self.put([obj])
+        return obj
+
+    def put(self, objects: list):
+        """Keep the given objects, replacing any we have with the same ids.
+
+        Args:
+            objects: []domain object
+        """
+        now = time.time()
+        rows = []
+        for obj in objects:
+            kind = _kind(obj)
+            ttl = self._ttl.get(kind, 0)
+            if not kind or not obj.id or ttl <= 0:
+                continue
+            data = obj.encode()
+            data["id"] = obj.id
+            rows.append((obj.id, kind, json.dumps(data), now + ttl))
+
+        db = self._db()
+        if db is None or not rows:
+            return
+        try:
+            with db:
+                db.execute("BEGIN")
+                db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _read_published(self, conn, item_id: str, stale: bool):
+        """Return whether we have the item's published version & the version.
+
+        Returns:
+            (bool, domain.Version or None)
+        """
+        db = self._db()
+        if db is None:
+            return False, None
+
+        rows = self._execute(db, "SELECT version, expires FROM published WHERE item = ?", item_id)
+        if not rows or (rows[0][1] < time.time() and not stale):
+            return False, None
+        if not rows[0][0]:
+            return True, None  # the item has no published version
+
+        version = self._read(conn, rows[0][0], True)
+        return version is not None, version
+
+    def get_published(self, conn, item_id: str, fetch):
+        """Return the published version of an item, fetching it if we don't have it.
+
+        Args:
+            conn: middleware the version uses
+            item_id: id of the item
+            fetch: function () -> version or None, asks the server
+
+        Returns:
+            domain.Version or None
+        """
+        found, version = self._read_published(conn, item_id, False)
+        if found:
+            self.hits += 1
+            return version
+
+        self.misses += 1
+        try:
+            version = fetch()
+        except errors.DeadlineExceededError:
+            raise  # the caller ran out of time, the server may be fine
+        except _UNREACHABLE:
+            found, version = self._read_published(conn, item_id, True)
+            if not found:
+                raise
+            self.stale_hits += 1
+            return version
+
+        self.put_published(item_id, version)
+        return version
+
+    def put_published(self, item_id: str, version):
+        """Record the published version of an item.
+
+        Args:
+            item_id: id of the item
+            version: domain.Version or None
+        """
+        ttl = self._ttl.get("published", 0)
+        db = self._db()
+        if db is None or not item_id or ttl <= 0:
+            return
+
+        if version is not None:
+            self.put([version])
+        self._execute(
+            db,
+            "INSERT OR REPLACE INTO published VALUES (?, ?, ?)",
+            item_id, version.id if version is not None else "", time.time() + ttl,
+        )
+
+    def invalidate(self, oid: str):
+        """Drop the object with the given id & any published version entry it's part of.
+
+        Args:
+            oid: id of an object
+        """
+        db = self._db()
+        if db is None or not oid:
+            return
+        self._execute(db, "DELETE FROM objects WHERE id = ?", oid)
+        self._execute(db, "DELETE FROM published WHERE item = ? OR version = ?", oid, oid)
+
+    def clear_published(self):
+        """Drop every item's published version.
+        """
+        db = self._db()
+        if db is not None:
+            self._execute(db, "DELETE FROM published")
+
+    def clear(self):
+        db = self._db()
+        if db is not None:
+            self._execute(db, "DELETE FROM objects")
+            self._execute(db, "DELETE FROM published")
+
+    @property
+    def stats(self) -> dict:
+        """Return hits, misses, stale hits (served as the server couldn't be reached) &
+        database errors.
+
+        Returns:
+            dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "errors": self.errors,
+        }
@@ -22,6 +22,10 @@ link.py
 resource.py
     Contains Resource class
 
+lazy.py
+    Contains lazy versions of the domain classes that wrap a gRPC message, used by the gRPC
+    middlewares when asked to decode lazily.
+
 query_desc.py
     Contains QueryDesc class. This is used by the Search class but isn't intended to be directly
     exposed.
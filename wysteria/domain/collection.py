@@ -7,6 +7,7 @@ import wysteria.constants as consts
 from wysteria.domain.base import ChildWysObj
 from wysteria.domain.item import Item
 from wysteria.domain.query_desc import QueryDesc
+from wysteria.cache import fetch_one
 
 
 class Collection(ChildWysObj):
@@ -46,9 +47,13 @@ class Collection(ChildWysObj):
         Returns:
             str
         """
-        result = self.__conn.find_collections([QueryDesc().id(self.id)], limit=1)
+        result = fetch_one(
+            self.__conn,
+            self.id,
+            lambda: self.__conn.find_collections([QueryDesc().id(self.id)], limit=1),
+        )
         if result:
-            return result[0].uri
+            return result._uri
         return ""
 
     @property
@@ -163,10 +168,8 @@ class Collection(ChildWysObj):
         Returns:
             domain.Collection or None
         """
-        results = self.__conn.find_collections(
-            [QueryDesc().id(self.parent)],
-            limit=1
+        return fetch_one(
+            self.__conn,
+            self._parent,
+            lambda: self.__conn.find_collections([QueryDesc().id(self._parent)], limit=1),
         )
-        if results:
-            return results[0]
-        return None
@@ -4,6 +4,7 @@
 import wysteria.constants as consts
 from wysteria.domain.base import ChildWysObj
 from wysteria.domain.query_desc import QueryDesc
+from wysteria.cache import fetch_one, fetch_published
 from wysteria.domain.version import Version
 from wysteria.domain.link import Link
 
@@ -49,9 +50,13 @@ class Item(ChildWysObj):
         Returns:
             str
         """
-        result = self.__conn.find_items([QueryDesc().id(self.id)], limit=1)
+        result = fetch_one(
+            self.__conn,
+            self.id,
+            lambda: self.__conn.find_items([QueryDesc().id(self.id)], limit=1),
+        )
         if result:
-            return result[0].uri
+            return result._uri
         return ""
 
     @property
@@ -215,7 +220,7 @@ class Item(ChildWysObj):
         Returns:
             domain.Version or None
         """
-        return self.__conn.get_published_version(self.id)
+        return fetch_published(self.__conn, self.id)
 
     def _get_parent(self):
         """Return the parent item of this version
@@ -223,10 +228,8 @@ class Item(ChildWysObj):
         Returns:
             domain.Collection or None
         """
-        results = self.__conn.find_collections(
-            [QueryDesc().id(self._parent)],
-            limit=1,
+        return fetch_one(
+            self.__conn,
+            self._parent,
+            lambda: self.__conn.find_collections([QueryDesc().id(self._parent)], limit=1),
         )
-        if results:
-            return results[0]
-        return None
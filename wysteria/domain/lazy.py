@@ -0,0 +1,101 @@
+"""Domain objects that wrap a gRPC (protobuf) message.
+
+Fields & facets are read from the message the first time they're accessed, so decoding a
+large find reply costs next to nothing until the results are used. Otherwise these behave
+exactly as (and are instances of) the usual domain classes.
+
+"""
+from wysteria.domain.base import ChildWysObj
+from wysteria.domain.collection import Collection
+from wysteria.domain.item import Item
+from wysteria.domain.version import Version
+from wysteria.domain.resource import Resource
+from wysteria.domain.link import Link
+
+
+class _LazyObj:
+    """Mixin reading the fields of a domain object from a pb message on first access.
+    """
+    _DOMAIN = None  # the domain class we're a lazy version of
+    _FIELDS = {}  # our attribute -> field of the pb message it's read from
+
+    def __init__(self, conn, msg):
+        # Nb. we skip the domain __init__ as it sets every field, so set what it would have
+        self._msg = msg
+        setattr(self, "_%s__conn" % self._DOMAIN.__name__, conn)
+        if isinstance(self, ChildWysObj):
+            self._ChildWysObj__cached_parent_obj = None
+
+    def __getattr__(self, name):
+        # only called for attributes we don't have yet
+        field = self._FIELDS.get(name)
+        if field is None:
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (self.__class__.__name__, name)
+            )
+
+        value = getattr(self._msg, field)
+        if field == "Facets":
+            value = dict(value)
+
+        self.__dict__[name] = value
+        return value
+
+
+class LazyCollection(_LazyObj, Collection):
+    _DOMAIN = Collection
+    _FIELDS = {
+        "_id": "Id",
+        "_uri": "Uri",
+        "_name": "Name",
+        "_parent": "Parent",
+        "_facets": "Facets",
+    }
+
+
+class LazyItem(_LazyObj, Item):
+    _DOMAIN = Item
+    _FIELDS = {
+        "_id": "Id",
+        "_uri": "Uri",
+        "_parent": "Parent",
+        "_facets": "Facets",
+        "_itemtype": "ItemType",
+        "_variant": "Variant",
+    }
+
+
+class LazyVersion(_LazyObj, Version):
+    _DOMAIN = Version
+    _FIELDS = {
+        "_id": "Id",
+        "_uri": "Uri",
+        "_parent": "Parent",
+        "_facets": "Facets",
+        "_number": "Number",
+    }
+
+
+class LazyResource(_LazyObj, Resource):
+    _DOMAIN = Resource
+    _FIELDS = {
+        "_id": "Id",
+        "_uri": "Uri",
+        "_parent": "Parent",
+        "_facets": "Facets",
+        "_name": "Name",
+        "_resourcetype": "ResourceType",
+        "_location": "Location",
+    }
+
+
+class LazyLink(_LazyObj, Link):
+    _DOMAIN = Link
+    _FIELDS = {
+        "_id": "Id",
+        "_uri": "Uri",
+        "_facets": "Facets",
+        "_name": "Name",
+        "_src": "Src",
+        "_dst": "Dst",
+    }
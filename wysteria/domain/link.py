@@ -3,6 +3,7 @@
 """
 from wysteria.domain.base import WysBaseObj
 from wysteria.domain.query_desc import QueryDesc
+from wysteria.cache import fetch_one
 
 
 class Link(WysBaseObj):
@@ -44,9 +45,13 @@ class Link(WysBaseObj):
         Returns:
             str
         """
-        result = self.__conn.find_links([QueryDesc().id(self.id)], limit=1)
+        result = fetch_one(
+            self.__conn,
+            self.id,
+            lambda: self.__conn.find_links([QueryDesc().id(self.id)], limit=1),
+        )
         if result:
-            return result[0].uri
+            return result._uri
         return ""
 
     def _update_facets(self, facets: dict):
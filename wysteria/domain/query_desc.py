@@ -2,6 +2,7 @@
 
 """
 import copy
+import json
 
 
 class QueryDesc:
@@ -19,7 +20,25 @@ class QueryDesc:
       possess this property.
 
     """
+
+    # (wire name, attribute) of each of our search params
+    _PARAMS = (
+        ("id", "_id"),
+        ("uri", "_uri"),
+        ("parent", "_parent"),
+        ("versionnumber", "_versionnumber"),
+        ("itemtype", "_itemtype"),
+        ("variant", "_variant"),
+        ("facets", "_facets"),
+        ("name", "_name"),
+        ("resourcetype", "_resourcetype"),
+        ("location", "_location"),
+        ("linksrc", "_linksrc"),
+        ("linkdst", "_linkdst"),
+    )
+
     def __init__(self):
+        self._cache = {}  # our key & encoded forms, cleared whenever a param is set
         self._id = ""
         self._uri = ""
         self._parent = ""
@@ -61,23 +80,57 @@ class QueryDesc:
     def encode(self) -> dict:
         """Return dict representation of this object.
 
+        Only params that have been set are included, the server treats missing ones as unset.
+
         Returns:
             dict
         """
-        return {
-            "id": self._id,
-            "uri": self._uri,
-            "parent": self._parent,
-            "versionnumber": self._versionnumber,
-            "itemtype": self._itemtype,
-            "variant": self._variant,
-            "facets": copy.copy(self._facets),
-            "name": self._name,
-            "resourcetype": self._resourcetype,
-            "location": self._location,
-            "linksrc": self._linksrc,
-            "linkdst": self._linkdst,
-        }
+        data = {}
+        attrs = self.__dict__
+        for name, attr in self._PARAMS:
+            value = attrs[attr]
+            if value:
+                data[name] = value
+
+        if self._facets:
+            data["facets"] = copy.copy(self._facets)
+        return data
+
+    @property
+    def key(self) -> tuple:
+        """Return a hashable key for this query, equal for queries with the same params.
+
+        Returns:
+            tuple
+        """
+        key = self._cache.get(None)
+        if key is None:
+            # facets as json, so values of different types (eg. 1 & "1") don't share a key
+            key = self._cache[None] = tuple(
+                (name, json.dumps(value, sort_keys=True, default=repr))
+                if name == "facets" else (name, value)
+                for name, value in self.cached("dict", QueryDesc.encode).items()
+            )
+        return key
+
+    def cached(self, name: str, encoder):
+        """Return our encoded form from the given encoder.
+
+        The result is kept until one of our params is set, so a query sent repeatedly is
+        only encoded once. The result is shared, it must not be modified.
+
+        Args:
+            name: name of the encoding (eg. "pb")
+            encoder: function (QueryDesc) -> encoded form
+
+        Returns:
+            ?
+        """
+        try:
+            return self._cache[name]
+        except KeyError:
+            encoded = self._cache[name] = encoder(self)
+            return encoded
 
     def id(self, val: str):
         """Match on object by it's Id.
@@ -89,6 +142,7 @@ class QueryDesc:
             self
         """
         self._id = val
+        self._cache.clear()
         return self
 
     def uri(self, val: str):
@@ -101,6 +155,7 @@ class QueryDesc:
             self
         """
         self._uri = val
+        self._cache.clear()
         return self
 
     def parent(self, val: str):
@@ -115,6 +170,7 @@ class QueryDesc:
             self
         """
         self._parent = val
+        self._cache.clear()
         return self
 
     def version_number(self, val: int):
@@ -129,6 +185,7 @@ class QueryDesc:
             self
         """
         self._versionnumber = val
+        self._cache.clear()
         return self
 
     def item_type(self, val: str):
@@ -143,6 +200,7 @@ class QueryDesc:
             self
         """
         self._itemtype = val
+        self._cache.clear()
         return self
 
     def item_variant(self, val):
@@ -157,6 +215,7 @@ class QueryDesc:
             self
         """
         self._variant = val
+        self._cache.clear()
         return self
 
     def has_facets(self, **kwargs):
@@ -169,6 +228,7 @@ class QueryDesc:
             self
         """
         self._facets = copy.copy(kwargs)
+        self._cache.clear()
         return self
 
     def name(self, val: str):
@@ -183,6 +243,7 @@ class QueryDesc:
             self
         """
         self._name = val
+        self._cache.clear()
         return self
 
     def resource_type(self, val: str):
@@ -197,6 +258,7 @@ class QueryDesc:
             self
         """
         self._resourcetype = val
+        self._cache.clear()
         return self
 
     def resource_location(self, val: str):
@@ -211,6 +273,7 @@ class QueryDesc:
             self
         """
         self._location = val
+        self._cache.clear()
         return self
 
     def link_destination(self, val: str):
@@ -225,6 +288,7 @@ class QueryDesc:
             self
         """
         self._linkdst = val
+        self._cache.clear()
         return self
 
     def link_source(self, val: str):
@@ -239,6 +303,7 @@ class QueryDesc:
             self
         """
         self._linksrc = val
+        self._cache.clear()
         return self
 
     def __repr__(self):
@@ -4,6 +4,7 @@
 
 from wysteria.domain.base import ChildWysObj
 from wysteria.domain.query_desc import QueryDesc
+from wysteria.cache import fetch_one
 
 
 class Resource(ChildWysObj):
@@ -64,12 +65,11 @@ class Resource(ChildWysObj):
         Returns:
             domain.Item or None
         """
-        results = self.__conn.find_versions(
-            [QueryDesc().id(self._parent)], limit=1
+        return fetch_one(
+            self.__conn,
+            self._parent,
+            lambda: self.__conn.find_versions([QueryDesc().id(self._parent)], limit=1),
         )
-        if results:
-            return results[0]
-        return None
 
     def _fetch_uri(self) -> str:
         """Fetch uri from remote server.
@@ -77,9 +77,13 @@ class Resource(ChildWysObj):
         Returns:
             str
         """
-        result = self.__conn.find_resources([QueryDesc().id(self.id)], limit=1)
+        result = fetch_one(
+            self.__conn,
+            self.id,
+            lambda: self.__conn.find_resources([QueryDesc().id(self.id)], limit=1),
+        )
         if result:
-            return result[0].uri
+            return result._uri
         return ""
 
     def _encode(self) -> dict:
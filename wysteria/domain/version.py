@@ -4,6 +4,7 @@
 
 from wysteria.domain.base import ChildWysObj
 from wysteria.domain.query_desc import QueryDesc
+from wysteria.cache import fetch_one
 from wysteria.domain.resource import Resource
 from wysteria.domain.link import Link
 from wysteria import constants as consts
@@ -157,9 +158,13 @@ class Version(ChildWysObj):
         Returns:
             str
         """
-        result = self.__conn.find_versions([QueryDesc().id(self.id)], limit=1)
+        result = fetch_one(
+            self.__conn,
+            self.id,
+            lambda: self.__conn.find_versions([QueryDesc().id(self.id)], limit=1),
+        )
         if result:
-            return result[0].uri
+            return result._uri
         return ""
 
     def _encode(self) -> dict:
@@ -209,6 +214,9 @@ class Version(ChildWysObj):
 
     def publish(self):
         """Set this version as the published one"""
+        cache = getattr(self.__conn, "cache", None)
+        if cache is not None:
+            cache.put(self)  # so the middleware knows which item's published version this is
         self.__conn.publish_version(self.id)
 
     def _update_facets(self, facets):
@@ -238,9 +246,8 @@ class Version(ChildWysObj):
         Returns:
             domain.Item or None
         """
-        results = self.__conn.find_items(
-            [QueryDesc().id(self._parent)], limit=1
+        return fetch_one(
+            self.__conn,
+            self._parent,
+            lambda: self.__conn.find_items([QueryDesc().id(self._parent)], limit=1),
         )
-        if results:
-            return results[0]
-        return None
@@ -4,6 +4,11 @@ class RequestTimeoutError(Exception):
     pass
 
 
+class DeadlineExceededError(RequestTimeoutError):
+    """The deadline set for the request(s) passed before they could finish"""
+    pass
+
+
 class UnknownMiddlewareError(Exception):
     """The config asks to use a middleware for which we can't find a class definition"""
     pass
@@ -11,9 +11,36 @@ abstract_middleware.py
 impl_nats.py
     A Nats.io implementation of the abstract middleware class.
 
+impl_nats_async.py
+    A Nats.io middleware whose calls are coroutines on the caller's asyncio event loop.
+
+codec.py
+    JSON codecs used by the Nats.io middlewares, orjson when installed.
+
+memo.py
+    A small memo used to avoid re-encoding repeated queries.
+
+latency.py
+    Adaptive timeouts, retry backoff, retry budget & request hedging for middleware requests.
+
+priority.py
+    Priority lanes, so interactive requests are sent ahead of bulk ones.
+
+deadline.py
+    Deadlines covering every request made within a block of code.
+
+singleflight.py
+    Coalescing of identical reads made at the same time into one request.
+
+batcher.py
+    Micro batching of lookups by id from many threads into one find.
+
 impl_grpc.py
     A gRPC implementation of the the middleware class
 
+impl_grpc_async.py
+    A gRPC middleware built on grpc.aio whose calls are coroutines on the caller's event loop.
+
 wgrpc/
     Auto generated files for gRPC by protobuf.
 
@@ -27,15 +54,25 @@ Exported
   GRPCMiddleware
     A gRPC implementation of the the middleware class
 
+  AsyncNatsMiddleware
+    A Nats.io middleware for asyncio applications
+
+  AsyncGRPCMiddleware
+    A gRPC middleware for asyncio applications
+
 
 
 """
 
 from wysteria.middleware.impl_nats import NatsMiddleware
+from wysteria.middleware.impl_nats_async import AsyncNatsMiddleware
 from wysteria.middleware.impl_grpc import GRPCMiddleware
+from wysteria.middleware.impl_grpc_async import AsyncGRPCMiddleware
 
 
 __all__ = [
     "NatsMiddleware",
+    "AsyncNatsMiddleware",
     "GRPCMiddleware",
+    "AsyncGRPCMiddleware",
 ]
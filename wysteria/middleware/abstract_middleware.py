@@ -1,7 +1,82 @@
 import abc
+import functools
 
 from wysteria import constants as consts
 from wysteria import errors
+from wysteria.cache import NEGATIVE_PUBLISHED, QueryCache
+from wysteria.domain import QueryDesc
+
+
+def _lookup_id(query: list) -> str:
+    """Return the id looked up if the query is a lookup of one object by id.
+
+    Args:
+        query: []domain.QueryDesc
+
+    Returns:
+        str, empty if the query is anything else
+    """
+    if len(query) != 1:
+        return ""
+    key = query[0].key
+    if len(key) == 1 and key[0][0] == "id":
+        return key[0][1]
+    return ""
+
+
+def invalidates(func):
+    """Decorate a middleware method that changes the object whose id is its first arg,
+    dropping the object & any find results from the middleware's caches once the method
+    returns (or raises).
+    """
+    @functools.wraps(func)
+    def fn(self, oid, *args, **kwargs):
+        try:
+            return func(self, oid, *args, **kwargs)
+        finally:
+            self._invalidate(oid)
+    return fn
+
+
+def creates(func):
+    """Decorate a middleware method that creates an object, dropping any find results from
+    the middleware's caches once the method returns (or raises).
+    """
+    @functools.wraps(func)
+    def fn(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._invalidate()
+    return fn
+
+
+def publishes(func):
+    """Decorate a middleware method that publishes the version whose id is its first arg,
+    recording the version as its item's published version once the method returns.
+    """
+    @functools.wraps(func)
+    def fn(self, oid, *args, **kwargs):
+        version = self.cache.peek(oid) if self.cache is not None else None
+        published = False
+        try:
+            result = func(self, oid, *args, **kwargs)
+            published = True
+            return result
+        finally:
+            self._invalidate(oid)
+            self._published(version if published else None)
+    return fn
+
+
+def coalesces(func):
+    """Decorate a middleware read whose only arg is an id, so identical calls made at the
+    same time share one request.
+    """
+    @functools.wraps(func)
+    def fn(self, oid):
+        return self._coalesce((func.__name__, oid), lambda: func(self, oid))
+    return fn
 
 
 class WysteriaConnectionBase(metaclass=abc.ABCMeta):
@@ -12,6 +87,119 @@ class WysteriaConnectionBase(metaclass=abc.ABCMeta):
     interface. Valid python clients should subclass from this.
     """
 
+    cache = None  # wysteria.cache.ObjectCache shared with the client (& domain objects), if any
+    query_cache = None  # wysteria.cache.QueryCache of find results, if any
+    published_cache = None  # wysteria.cache.PublishedCache of item id -> version, if any
+    disk_cache = None  # wysteria.disk_cache.DiskCache shared with other processes, if any
+    negative_cache = None  # wysteria.cache.NegativeCache of lookups that found nothing, if any
+    _flights = None  # wysteria.middleware.singleflight.Singleflight coalescing reads, if any
+    _batcher = None  # wysteria.middleware.batcher.Batcher of lookups by id, if any
+
+    def _invalidate(self, oid: str=None):
+        """Something is being changed, drop what it may affect from our caches.
+
+        Args:
+            oid: id of the object being changed, if any
+        """
+        if self._flights is not None:
+            self._flights.forget()
+        if oid and self.cache is not None:
+            self.cache.invalidate(oid)
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        if oid and self.published_cache is not None:
+            self.published_cache.invalidate(oid)
+        if oid and self.disk_cache is not None:
+            self.disk_cache.invalidate(oid)
+        if not oid and self.negative_cache is not None:
+            self.negative_cache.clear()  # we may have created something looked for
+
+    def _published(self, version):
+        """A version has been published (or may have been), update our published cache.
+
+        Args:
+            version: the version published, None if we don't know it or the publish failed
+        """
+        if self.negative_cache is not None:
+            if version is None:
+                self.negative_cache.clear()
+            else:
+                self.negative_cache.invalidate((NEGATIVE_PUBLISHED, version.parent))
+
+        if self.disk_cache is not None:
+            if version is None:
+                self.disk_cache.clear_published()
+            else:
+                self.disk_cache.put_published(version.parent, version)
+
+        if self.published_cache is None:
+            return
+        if version is None:
+            # we can't tell which item's published version changed
+            self.published_cache.clear()
+        else:
+            self.published_cache.put(version.parent, version)
+
+    def _cached_find(self, kind: str, query: list, limit: int, offset: int, send) -> list:
+        """Return the results of a find query, from our query cache if we have one.
+
+        Args:
+            kind: type of object (or route) searched for
+            query: []domain.QueryDesc
+            limit:
+            offset:
+            send: function (query, limit, offset) -> list, sends a query
+
+        Returns:
+            list
+        """
+        key = QueryCache.key(kind, query, limit, offset)
+        find = lambda: send(query, limit, offset)
+
+        oid = _lookup_id(query)
+        if self._batcher is not None and oid and not offset:
+            find = lambda: self._batcher.load(
+                kind, oid, lambda ids: send([QueryDesc().id(i) for i in ids], len(ids), 0)
+            )
+
+        if self.disk_cache is not None:
+            find = self._keeping(find)
+        if self._flights is not None:
+            find = lambda find=find: list(self._coalesce(key, find))
+
+        if self.query_cache is None:
+            return find()
+        return self.query_cache.get(key, find)
+
+    def _coalesce(self, key, fn):
+        """Return fn(), sharing the request with identical calls already in flight.
+
+        Args:
+            key: hashable key, the same for calls that would return the same thing
+            fn: function () -> result, sends the request
+
+        Returns:
+            result of fn
+        """
+        if self._flights is None:
+            return fn()
+        return self._flights.do(key, fn)
+
+    def _keeping(self, find):
+        """Wrap a find so the objects it returns are written to our disk cache.
+
+        Args:
+            find: function () -> list, sends the query
+
+        Returns:
+            function () -> list
+        """
+        def fn():
+            results = find()
+            self.disk_cache.put(results)
+            return results
+        return fn
+
     @staticmethod
     def translate_server_exception(msg):
         """Turn a wysteria error string into a python exception.
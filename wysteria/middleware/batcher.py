@@ -0,0 +1,113 @@
+"""Micro batching of lookups by id.
+
+Domain helpers like get_parent() each look up one object by id, so walking many objects
+sends one request per object. With batching turned on, by-id lookups of the same type made
+by any thread within a short window (or until the batch is full) are sent together as one
+find matching any of the ids, & each caller is handed its own object.
+
+The first lookup of a batch waits out the window & sends it, with its own deadline &
+priority lane. Lookups that join it wait with their own deadline.
+"""
+import threading
+
+from wysteria import errors
+from wysteria.middleware import deadline
+
+
+_DEFAULT_BATCH_SIZE = 100  # ids sent in one find
+
+
+class _Batch:
+    """Lookups of one type collected to be sent together."""
+
+    def __init__(self, send):
+        self.send = send
+        self.ids = {}  # id -> None, in order of arrival
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.found = {}  # id -> object
+        self.error = None
+
+
+class Batcher:
+    """Collects lookups by id from many threads into one find per type.
+
+    Thread safe.
+    """
+    def __init__(self, window: float, size: int=_DEFAULT_BATCH_SIZE):
+        """
+
+        Args:
+            window: seconds to collect lookups for before sending them
+            size: max ids sent in one find, a full batch is sent at once
+        """
+        self._window = window
+        self._size = max(1, size)
+        self._pending = {}  # kind -> _Batch
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.batches = 0
+
+    def load(self, kind: str, oid: str, send) -> list:
+        """Return the object with the given id, in a list, or an empty list if none is found.
+
+        Args:
+            kind: type of object (or route) looked up, only lookups of one kind are batched
+            oid: id of the object
+            send: function ([]str) -> []object, finds the objects with any of the given ids
+
+        Returns:
+            []object
+
+        Raises:
+            whatever send raises
+            DeadlineExceededError if our deadline passes while waiting on the batch
+        """
+        with self._lock:
+            self.lookups += 1
+            batch = self._pending.get(kind)
+            first = batch is None
+            if first:
+                batch = self._pending[kind] = _Batch(send)
+            batch.ids[oid] = None
+            if len(batch.ids) >= self._size:
+                del self._pending[kind]
+                batch.full.set()
+
+        if first:
+            self._send(kind, batch)
+        elif not batch.done.wait(deadline.timeout()):
+            raise errors.DeadlineExceededError("Deadline exceeded")
+
+        if isinstance(batch.error, errors.DeadlineExceededError) and not first:
+            return send([oid])  # it ran out of time under a deadline shorter than ours
+        if batch.error is not None:
+            raise batch.error
+
+        obj = batch.found.get(oid)
+        return [] if obj is None else [obj]
+
+    def _send(self, kind: str, batch: _Batch):
+        """Wait out the window (or for the batch to fill), then send the batch.
+        """
+        batch.full.wait(self._window)
+        with self._lock:
+            if self._pending.get(kind) is batch:
+                del self._pending[kind]
+            self.batches += 1
+
+        try:
+            for obj in batch.send(list(batch.ids)):
+                batch.found[obj.id] = obj
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def report(self) -> dict:
+        """Return the number of lookups made & the number of finds sent for them.
+
+        Returns:
+            dict
+        """
+        return {"lookups": self.lookups, "batches": self.batches}
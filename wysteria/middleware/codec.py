@@ -0,0 +1,103 @@
+"""JSON codecs for the NATS middleware.
+
+Codecs work in bytes end to end, so requests & replies go to / from the wire without a
+detour through str. orjson is used when installed, otherwise we fall back to the stdlib.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, it's just faster
+    orjson = None
+
+
+CODEC_JSON = "json"
+CODEC_ORJSON = "orjson"
+
+
+# the server's UpperCase keys -> our lowercase domain constructor fields, filled as we go
+_FIELDS = {}
+
+
+def to_fields(data: dict) -> dict:
+    """Map the server's keys for an object to the kwargs its domain class expects.
+
+    Args:
+        data: an object as sent by the server
+
+    Returns:
+        dict
+    """
+    fields = {}
+    for k, v in data.items():
+        name = _FIELDS.get(k)
+        if name is None:
+            name = _FIELDS[k] = k.lower()
+        fields[name] = v
+    return fields
+
+
+class JSONCodec:
+    """Encodes & decodes with the stdlib json module.
+    """
+    name = CODEC_JSON
+
+    def dumps(self, obj) -> bytes:
+        """Encode an object.
+
+        Args:
+            obj: json serialisable object
+
+        Returns:
+            bytes
+        """
+        return json.dumps(obj, separators=(",", ":")).encode("utf8")
+
+    def loads(self, data: bytes):
+        """Decode an object.
+
+        Args:
+            data: utf8 encoded json
+
+        Returns:
+            object
+        """
+        return json.loads(data)
+
+
+class ORJSONCodec(JSONCodec):
+    """Encodes & decodes with orjson.
+    """
+    name = CODEC_ORJSON
+
+    def dumps(self, obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes):
+        return orjson.loads(data)
+
+
+def get_codec(name: str=None) -> JSONCodec:
+    """Return a codec by name, or the fastest available if no name is given.
+
+    Args:
+        name: CODEC_JSON, CODEC_ORJSON or None
+
+    Returns:
+        JSONCodec
+
+    Raises:
+        ValueError if the codec isn't known or isn't installed
+    """
+    if not name:
+        return ORJSONCodec() if orjson else JSONCodec()
+
+    if name == CODEC_JSON:
+        return JSONCodec()
+
+    if name == CODEC_ORJSON:
+        if not orjson:
+            raise ValueError("Codec '%s' requested but orjson isn't installed" % name)
+        return ORJSONCodec()
+
+    raise ValueError("Unknown codec '%s'" % name)
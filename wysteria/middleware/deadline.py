@@ -0,0 +1,77 @@
+"""Deadlines for requests, so a slow or wedged server can't block callers forever.
+
+A deadline is set for a block of code with `within()` & covers every request made in it,
+including those made by domain helpers that take several round trips
+
+    with deadline.within(5):
+        version.get_linked()
+
+Nested deadlines can only shorten the deadline already set. As with priority lanes,
+deadlines are tracked per thread (& per asyncio task).
+
+Middlewares give requests no longer than the time remaining, don't retry requests they
+can't finish in time & raise DeadlineExceededError once the deadline has passed.
+"""
+import contextlib
+import contextvars
+import time
+
+from wysteria import errors
+
+
+_DEADLINE = contextvars.ContextVar("wysteria_deadline", default=None)
+
+
+@contextlib.contextmanager
+def within(seconds: float):
+    """Requests made within this block must finish in the given number of seconds.
+
+    Can also be used to decorate a function.
+
+    Args:
+        seconds: time allowed
+    """
+    at = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    if current is not None:
+        at = min(at, current)
+
+    token = _DEADLINE.set(at)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining():
+    """Return the seconds left before the current deadline.
+
+    Returns:
+        float or None if no deadline is set
+    """
+    at = _DEADLINE.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def timeout(default: float=None):
+    """Return the timeout to give a request, the default or the time remaining if less.
+
+    Args:
+        default: timeout to use if we have longer than this, None for no limit
+
+    Returns:
+        float or None
+
+    Raises:
+        DeadlineExceededError if the deadline has passed
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise errors.DeadlineExceededError("Deadline exceeded")
+    if default is None:
+        return left
+    return min(default, left)
@@ -1,10 +1,23 @@
+import concurrent.futures
 import grpc
+import itertools
 import json
+import threading
+import time
 
-from google.protobuf.struct_pb2 import Struct
 
 from wysteria import domain
-from wysteria.middleware.abstract_middleware import WysteriaConnectionBase
+from wysteria.domain import lazy
+from wysteria import errors
+from wysteria.middleware import batcher
+from wysteria.middleware import deadline
+from wysteria.middleware import latency
+from wysteria.middleware import priority
+from wysteria.middleware import singleflight
+from wysteria.middleware.abstract_middleware import (
+    WysteriaConnectionBase, coalesces, creates, invalidates, publishes
+)
+from wysteria.middleware.memo import Memo
 from wysteria.middleware.wgrpc import stubs
 from wysteria.middleware.wgrpc.wysteria import grpc_pb2 as pb
 
@@ -12,72 +25,1057 @@ from wysteria.middleware.wgrpc.wysteria import grpc_pb2 as pb
 _DEFAULT_URI = ":31000"  # default localhost, grpc port
 _DEFAULT_LIMIT = 500
 
+_DEFAULT_PROBE_INTERVAL = 5  # seconds between server health probes
+_DEFAULT_PROBE_TIMEOUT = 1  # seconds a server has to answer a probe
 
-def _get_secure_channel(url, tls):
+# a query for a collection that won't exist, used to probe server health & latency
+_PROBE_QUERY = pb.QueryDescs(Limit=1, all=[pb.QueryDesc(Id="wysteria-client-probe")])
+
+# QueryDesc.encode() keys -> pb.QueryDesc fields
+_QUERY_FIELDS = {
+    "id": "Id",
+    "uri": "Uri",
+    "parent": "Parent",
+    "versionnumber": "VersionNumber",
+    "itemtype": "ItemType",
+    "variant": "Variant",
+    "facets": "Facets",
+    "name": "Name",
+    "resourcetype": "ResourceType",
+    "location": "Location",
+    "linksrc": "LinkSrc",
+    "linkdst": "LinkDst",
+}
+
+# recently sent queries, so repeated searches aren't re-encoded
+_PREPARED = Memo(32)
+
+# how GRPCMiddleware picks a channel from its pool for each call
+POOL_ROUND_ROBIN = "round-robin"
+POOL_LEAST_LOADED = "least-loaded"
+
+
+def _parse_urls(url) -> list:
+    """Return a list of server urls.
+
+    Args:
+        url: a url, list of urls or comma separated string of urls
+
+    Returns:
+        []str
+    """
+    if not url:
+        return [_DEFAULT_URI]
+    if isinstance(url, str):
+        url = url.split(",")
+    return [u.strip() for u in url if u.strip()] or [_DEFAULT_URI]
+
+
+def _channel_options(
+    max_send_message_size: int=None,
+    max_receive_message_size: int=None,
+    keepalive_time: float=None,
+    keepalive_timeout: float=None,
+) -> list:
+    """Return gRPC channel arguments for the given channel profile.
+
+    Settings left as None fall back to gRPC's defaults.
+
+    Args:
+        max_send_message_size: largest message we'll send, in bytes (-1 for no limit)
+        max_receive_message_size: largest reply we'll accept, in bytes (-1 for no limit)
+        keepalive_time: seconds between keepalive pings, pings are sent on idle channels too
+        keepalive_timeout: seconds to wait for a ping ack before the connection is closed
+
+    Returns:
+        [](str, value)
+    """
+    options = []
+    if max_send_message_size is not None:
+        options.append(("grpc.max_send_message_length", max_send_message_size))
+    if max_receive_message_size is not None:
+        options.append(("grpc.max_receive_message_length", max_receive_message_size))
+    if keepalive_time is not None:
+        options.extend([
+            ("grpc.keepalive_time_ms", int(keepalive_time * 1000)),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ])
+    if keepalive_timeout is not None:
+        options.append(("grpc.keepalive_timeout_ms", int(keepalive_timeout * 1000)))
+    return options
+
+
+def _compression(name: str):
+    """Return the grpc compression matching the given name.
+
+    Args:
+        name: one of "gzip", "deflate", "none" or None
+
+    Returns:
+        grpc.Compression or None
+
+    Raises:
+        ValueError if the name isn't known
+    """
+    if not name:
+        return None
+
+    compression = {
+        "gzip": grpc.Compression.Gzip,
+        "deflate": grpc.Compression.Deflate,
+        "none": grpc.Compression.NoCompression,
+    }.get(name.lower())
+    if compression is None:
+        raise ValueError("Unknown compression '%s'" % name)
+    return compression
+
+
+def _get_secure_channel(url, tls, options: list=None, compression=None):
     """Return secure channel to server.
 
-    Stolen from: https://www.programcreek.com/python/example/95418/grpc.secure_channel
+    Stolen from: https://www.programcreek.com/python/example/95418/grpc.secure_channel
+
+    Args:
+        url: host/port info of server
+        tls: namedtuple of tls settings
+        options: extra channel arguments (see _channel_options)
+        compression: grpc.Compression to use on the channel
+
+    Returns:
+        grpc.Channel
+
+    Raises:
+        IOError
+        SSLError
+
+    """
+    with open(tls.cert, "rb") as f:
+        credentials = grpc.ssl_channel_credentials(f.read())
+
+    # create channel using ssl credentials
+    return grpc.secure_channel(
+        url,
+        credentials,
+        options=[('grpc.ssl_target_name_override', "ABCD",)] + (options or []),
+        compression=compression,
+    )
+
+
+def _translate_rpc_error(e: grpc.RpcError):
+    """Raise the python exception matching the given gRPC error.
+
+    Args:
+        e: error raised by a gRPC call
+
+    Raises:
+        DeadlineExceededError
+        ServerUnavailableError
+        AlreadyExistsError
+        NotFoundError
+        InvalidInputError
+        IllegalOperationError
+        Exception
+    """
+    if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+        raise errors.DeadlineExceededError(e.details())
+    if e.code() == grpc.StatusCode.UNAVAILABLE:
+        raise errors.ServerUnavailableError(e.details())
+
+    try:
+        msg = json.loads(e.debug_error_string()).get("grpc_message", str(e))
+    except (TypeError, ValueError, AttributeError):
+        msg = e.details() or str(e)
+    WysteriaConnectionBase.translate_server_exception(msg)
+
+
+def _handle_rpc_error(func):
+    def fn(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except grpc.RpcError as e:
+            _translate_rpc_error(e)
+    return fn
+
+
+class _GRPCCodec:
+    """Translates between domain objects & their protobuf messages.
+
+    Shared by the gRPC middlewares, decoded objects are bound to `self`. If `_lazy` is set
+    decoded objects wrap their message, reading fields from it only when they're accessed.
+    """
+    _lazy = False
+
+    # -- Encoders
+    def _encode_query_descs(self, query: list, limit: int, offset: int):
+        """Encode a query, reusing the message if the same query was sent recently.
+
+        Nb. The message returned is shared & must not be modified.
+
+        Args:
+            query: []domain.QueryDesc
+            limit: limit to apply
+            offset: offset to apply
+
+        Returns:
+            pb.QueryDescs
+        """
+        return _PREPARED.get(
+            (limit, offset, tuple(q.key for q in query)),
+            lambda: pb.QueryDescs(
+                Limit=limit,
+                Offset=offset,
+                all=[q.cached("pb", self._encode_query_desc) for q in query if q.is_valid]
+            ),
+        )
+
+    def _encode_query_desc(self, q: domain.QueryDesc):
+        """
+
+        Args:
+            q: domain.QueryDesc
+
+        Returns:
+            pb.QueryDesc
+        """
+        fields = {
+            _QUERY_FIELDS[name]: value
+            for name, value in q.cached("dict", domain.QueryDesc.encode).items()
+        }
+        if "Facets" in fields:
+            fields["Facets"] = self._encode_dict(fields["Facets"])
+        return pb.QueryDesc(**fields)
+
+    def _encode_collection(self, o: domain.Collection):
+        """
+
+        Args:
+            o: domain.Collection
+
+        Returns:
+            pb.Collection
+
+        """
+        return pb.Collection(
+            Parent=o.parent,
+            Id=o.id,
+            Uri=o._uri,
+            Name=o.name,
+            Facets=self._encode_dict(o.facets),
+        )
+
+    def _encode_item(self, o: domain.Item):
+        """
+
+        Args:
+            o: domain.Item
+
+        Returns:
+            pb.Item
+
+        """
+        return pb.Item(
+            Parent=o.parent,
+            Id=o.id,
+            Uri=o._uri,
+            ItemType=o.item_type,
+            Variant=o.variant,
+            Facets=self._encode_dict(o.facets),
+        )
+
+    def _encode_version(self, o: domain.Version):
+        """
+
+        Args:
+            o: domain.version
+
+        Returns:
+            pb.version
+
+        """
+        return pb.Version(
+            Parent=o.parent,
+            Id=o.id,
+            Uri=o._uri,
+            Number=o._number,
+            Facets=self._encode_dict(o.facets),
+        )
+
+    def _encode_resource(self, o: domain.Resource):
+        """
+
+        Args:
+            o: domain.Resource
+
+        Returns:
+            pb.Resource
+
+        """
+        return pb.Resource(
+            Parent=o.parent,
+            Id=o.id,
+            Uri=o._uri,
+            Name=o.name,
+            ResourceType=o.resource_type,
+            Location=o.location,
+            Facets=self._encode_dict(o.facets),
+        )
+
+    def _encode_link(self, o: domain.Link):
+        """
+
+        Args:
+            o: domain.Link
+
+        Returns:
+            pb.Link
+
+        """
+        return pb.Link(
+            Id=o.id,
+            Uri=o._uri,
+            Src=o.source,
+            Dst=o.destination,
+            Name=o.name,
+            Facets=self._encode_dict(o.facets),
+        )
+
+    @staticmethod
+    def _encode_dict(data: dict) -> dict:
+        return {str(key): str(value) for key, value in data.items()}
+
+    # -- Decoders
+    def _decode_collection(self, o: pb.Collection):
+        """
+
+        Args:
+            o: pb.Collection
+
+        Returns:
+            domain.Collection
+
+        """
+        if self._lazy:
+            return lazy.LazyCollection(self, o)
+
+        return domain.Collection(
+            self,
+            id=o.Id,
+            uri=o.Uri,
+            name=o.Name,
+            parent=o.Parent,
+            facets=dict(o.Facets or {}),
+        )
+
+    def _decode_item(self, o: pb.Item):
+        """
+
+        Args:
+            o: pb.Item
+
+        Returns:
+            domain.Item
+
+        """
+        if self._lazy:
+            return lazy.LazyItem(self, o)
+
+        return domain.Item(
+            self,
+            id=o.Id,
+            uri=o.Uri,
+            parent=o.Parent,
+            facets=dict(o.Facets or {}),
+            itemtype=o.ItemType,
+            variant=o.Variant,
+        )
+
+    def _decode_version(self, o: pb.Version):
+        """
+
+        Args:
+            o: pb.Version
+
+        Returns:
+            domain.Version
+
+        """
+        if self._lazy:
+            return lazy.LazyVersion(self, o)
+
+        return domain.Version(
+            self,
+            id=o.Id,
+            uri=o.Uri,
+            parent=o.Parent,
+            facets=dict(o.Facets or {}),
+            number=o.Number,
+        )
+
+    def _decode_resource(self, o: pb.Resource):
+        """
+
+        Args:
+            o: pb.Resource
+
+        Returns:
+            domain.Resource
+
+        """
+        if self._lazy:
+            return lazy.LazyResource(self, o)
+
+        return domain.Resource(
+            self,
+            parent=o.Parent,
+            name=o.Name,
+            resourcetype=o.ResourceType,
+            id=o.Id,
+            uri=o.Uri,
+            facets=dict(o.Facets or {}),
+            location=o.Location,
+        )
+
+    def _decode_link(self, o: pb.Link):
+        """
+
+        Args:
+            o: pb.Link
+
+        Returns:
+            domain.Link
+
+        """
+        if self._lazy:
+            return lazy.LazyLink(self, o)
+
+        return domain.Link(
+            self,
+            name=o.Name,
+            id=o.Id,
+            uri=o.Uri,
+            facets=dict(o.Facets or {}),
+            src=o.Src,
+            dst=o.Dst,
+        )
+
+    # -- Replies
+    def _decode_results(self, reply, decoder) -> list:
+        """
+
+        Args:
+            reply: pb.Collections, pb.Items etc
+            decoder: function to decode result objects
+
+        Returns:
+            list
+
+        """
+        err = reply.error.Text
+        if err:
+            WysteriaConnectionBase.translate_server_exception(err)
+
+        return [decoder(i) for i in reply.all]
+
+    def _decode_published(self, reply: pb.Version):
+        """
+
+        Args:
+            reply: pb.Version
+
+        Returns:
+            domain.Version
+
+        """
+        err = reply.error.Text
+        if err:
+            WysteriaConnectionBase.translate_server_exception(err)
+
+        return self._decode_version(reply)
+
+    @staticmethod
+    def _decode_id(reply: pb.Id) -> str:
+        """
+
+        Args:
+            reply: pb.Id
+
+        Returns:
+            str
+
+        """
+        err = reply.error.Text
+        if err:
+            WysteriaConnectionBase.translate_server_exception(err)
+
+        return reply.Id
+
+    @staticmethod
+    def _decode_id_and_num(reply: pb.IdAndNum):
+        """
+
+        Args:
+            reply: pb.IdAndNum
+
+        Returns:
+            str, int
+
+        """
+        err = reply.Text
+        if err:
+            WysteriaConnectionBase.translate_server_exception(err)
+
+        return reply.Id, reply.Version
+
+    @staticmethod
+    def _check_text(reply: pb.Text):
+        """Raise if the server replied with an error.
+
+        Args:
+            reply: pb.Text
+
+        """
+        err = reply.Text
+        if err:
+            WysteriaConnectionBase.translate_server_exception(err)
+
+
+class _PooledChannel:
+    """A channel, its stub & the number of calls in flight on it."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.stub = stubs.WysteriaGrpcStub(channel)
+        self.in_flight = 0
+
+
+class _ChannelPool:
+    """A fixed set of channels that calls are dispatched over.
+
+    """
+    def __init__(self, size: int=1, strategy: str=POOL_ROUND_ROBIN):
+        if strategy not in (POOL_ROUND_ROBIN, POOL_LEAST_LOADED):
+            raise ValueError("Unknown pool strategy '%s'" % strategy)
+
+        self._size = max(1, size)
+        self._strategy = strategy
+        self._channels = []
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def open(self, factory, options: list):
+        """Open our channels.
+
+        Args:
+            factory: function (options) -> grpc.Channel
+            options: channel arguments
+
+        """
+        if self._size > 1:
+            # otherwise gRPC shares one connection between channels to the same target
+            options = options + [("grpc.use_local_subchannel_pool", 1)]
+
+        self._channels = [_PooledChannel(factory(options)) for _ in range(0, self._size)]
+
+    def ready_futures(self) -> list:
+        """Start watching for all channels to be ready.
+
+        Returns:
+            []grpc.Future, one per channel
+        """
+        return [grpc.channel_ready_future(c.channel) for c in self._channels]
+
+    def close(self):
+        for c in self._channels:
+            c.channel.close()
+
+    @property
+    def in_flight(self) -> list:
+        """Return the number of calls in flight on each channel.
+
+        Returns:
+            []int
+        """
+        return [c.in_flight for c in self._channels]
+
+    def acquire(self) -> _PooledChannel:
+        """Pick a channel for a call, release() it when the call is done.
+
+        Returns:
+            _PooledChannel
+        """
+        with self._lock:
+            if self._strategy == POOL_LEAST_LOADED:
+                channel = min(self._channels, key=lambda c: c.in_flight)
+            else:
+                channel = self._channels[next(self._next) % len(self._channels)]
+            channel.in_flight += 1
+        return channel
+
+    def release(self, channel: _PooledChannel):
+        with self._lock:
+            channel.in_flight -= 1
+
+
+class _Endpoint:
+    """A server, the pool of channels to it & what we know of its health.
+
+    """
+    _LATENCY_WEIGHT = 0.3  # weight given to the newest probe in our moving average
+
+    def __init__(self, url: str, pool: _ChannelPool):
+        self.url = url
+        self.pool = pool
+        self.healthy = True
+        self.latency = None  # seconds, moving average of probe round trips
+
+    @property
+    def score(self) -> float:
+        """Lower is better, favours fast servers without piling every call onto one.
+
+        Returns:
+            float
+        """
+        return (self.latency or 0) * (1 + sum(self.pool.in_flight))
+
+    def probe(self, timeout: float):
+        """Time a cheap call to the server, ejecting it if it doesn't answer.
+
+        Args:
+            timeout: seconds to wait for a reply
+
+        """
+        channel = self.pool.acquire()
+        start = time.monotonic()
+        try:
+            channel.stub.FindCollections(_PROBE_QUERY, timeout=timeout)
+        except grpc.RpcError as e:
+            if e.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED):
+                self.healthy = False
+                return
+            # the server answered, even if it didn't like the question
+        finally:
+            self.pool.release(channel)
+
+        taken = time.monotonic() - start
+        if self.latency is None:
+            self.latency = taken
+        else:
+            self.latency += self._LATENCY_WEIGHT * (taken - self.latency)
+        self.healthy = True
+
+    def observe(self, error: Exception):
+        """Eject ourselves if a call failed because the server couldn't be reached.
+
+        Args:
+            error: the exception raised by a call, if any
+
+        """
+        if isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.UNAVAILABLE:
+            self.healthy = False
+
+
+class _Prober(threading.Thread):
+    """Periodically probes endpoints, re-admitting those that have recovered."""
+
+    def __init__(self, endpoints: list, interval: float, timeout: float):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._endpoints = endpoints
+        self._interval = interval
+        self._timeout = timeout
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            for endpoint in self._endpoints:
+                endpoint.probe(self._timeout)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class GRPCMiddleware(_GRPCCodec, WysteriaConnectionBase):
+    """Wysteria middleware client using gRPC to manage transport.
+
+    Alongside the blocking calls each operation has an *_async variant (eg. find_items_async)
+    that returns a concurrent.futures.Future without waiting on the server. Server errors are
+    raised from the future's result() as the usual python exceptions.
+
+    Given several server urls, calls are balanced across them: each server is probed every
+    `probe_interval` seconds & calls go to the healthy server with the best mix of probe
+    latency & calls in flight. Servers that can't be reached are ejected until a probe
+    succeeds again.
+
+    With `max_in_flight` set, calls beyond that wait for a free slot & some slots are kept
+    for calls in the interactive priority lane (see priority.lane), so bulk work can't
+    starve interactive callers.
+
+    Calls made within a deadline (see deadline.within) are given the time remaining &
+    cancelled by gRPC if they run over, otherwise each call is given `timeout` seconds.
+
+    """
+    def __init__(
+        self,
+        url,
+        tls=None,
+        max_send_message_size: int=None,
+        max_receive_message_size: int=None,
+        keepalive_time: float=None,
+        keepalive_timeout: float=None,
+        compression: str=None,
+        ready_timeout: float=None,
+        pool_size: int=1,
+        pool_strategy: str=POOL_ROUND_ROBIN,
+        probe_interval: float=_DEFAULT_PROBE_INTERVAL,
+        probe_timeout: float=_DEFAULT_PROBE_TIMEOUT,
+        lazy: bool=False,
+        hedge: bool=False,
+        hedge_ratio: float=latency._DEFAULT_HEDGE_RATIO,
+        max_in_flight: int=None,
+        interactive_reserve: int=None,
+        timeout: float=None,
+        batch_window: float=None,
+        batch_size: int=batcher._DEFAULT_BATCH_SIZE,
+    ):
+        """
+
+        Args:
+            url (str): host/port info of server, or a list (or comma separated string) of them
+            tls: namedtuple of tls settings
+            max_send_message_size (int): largest message we'll send, in bytes
+            max_receive_message_size (int): largest reply we'll accept, in bytes. Large find
+                replies may need this raised above gRPC's default 4MB.
+            keepalive_time (float): seconds between keepalive pings, keeps idle channels alive
+            keepalive_timeout (float): seconds to wait for a ping ack before giving up
+            compression (str): "gzip" or "deflate" to compress messages
+            ready_timeout (float): if set, connect() blocks until the channel is ready
+                or this many seconds have passed
+            pool_size (int): number of channels (& so connections) to spread calls over
+            pool_strategy (str): how to pick a channel for each call, either
+                POOL_ROUND_ROBIN or POOL_LEAST_LOADED (fewest calls in flight)
+            probe_interval (float): seconds between health probes when given several servers
+            probe_timeout (float): seconds a server has to answer a probe before it's ejected
+            lazy (bool): if set, results read their fields from the reply only when accessed.
+                Cheaper if you only need some fields of large results.
+            hedge (bool): if set, finds that are slower than usual (p95) are sent again &
+                the first reply is used
+            hedge_ratio (float): max hedges to send per call, caps the extra load hedging
+                puts on the server
+            max_in_flight (int): if set, max calls in flight at once, further calls block
+                until one finishes
+            interactive_reserve (int): of max_in_flight, slots only interactive calls may
+                use. By default a quarter.
+            timeout (float): seconds each call is allowed when no deadline is set, by
+                default calls wait as long as it takes
+            batch_window (float): if set, lookups of single objects by id made by any thread
+                within this many seconds are sent together as one find
+            batch_size (int): max ids sent in one batched find
+        """
+        self._lazy = lazy
+        self._timeout = timeout
+        self._hedger = latency.Hedger(latency.LatencyTracker(), hedge_ratio) if hedge else None
+        self._flights = singleflight.Singleflight()
+        self._batcher = batcher.Batcher(batch_window, batch_size) if batch_window else None
+        self._slots = None
+        if max_in_flight:
+            self._slots = priority.ReservedSlots(max_in_flight, interactive_reserve)
+        self._tls = tls
+        self._options = _channel_options(
+            max_send_message_size=max_send_message_size,
+            max_receive_message_size=max_receive_message_size,
+            keepalive_time=keepalive_time,
+            keepalive_timeout=keepalive_timeout,
+        )
+        self._compression = _compression(compression)
+        self._ready_timeout = ready_timeout
+        self._probe_interval = probe_interval
+        self._probe_timeout = probe_timeout
+        self._prober = None
+        self._endpoints = [
+            _Endpoint(u, _ChannelPool(pool_size, pool_strategy)) for u in _parse_urls(url)
+        ]
+
+    def _channel_factory(self, url: str):
+        """Return a function that opens a channel to the given url.
+
+        Args:
+            url: host/port info of server
+
+        Returns:
+            function (options) -> grpc.Channel
+        """
+        if self._tls and self._tls.enable:
+            return lambda options: _get_secure_channel(
+                url, self._tls, options=options, compression=self._compression
+            )
+        return lambda options: grpc.insecure_channel(
+            url, options=options, compression=self._compression
+        )
+
+    def connect(self):
+        """Connect to the other end.
+
+        Raises:
+            NoServersError if a ready_timeout is set & no server is ready in time
+        """
+        for endpoint in self._endpoints:
+            endpoint.pool.open(self._channel_factory(endpoint.url), self._options)
+
+        if self._ready_timeout is not None:
+            self._wait_ready(self._ready_timeout)
 
-    Args:
-        url: host/port info of server
-        tls: namedtuple of tls settings
+        if len(self._endpoints) > 1:
+            for endpoint in self._endpoints:
+                endpoint.probe(self._probe_timeout)
 
-    Returns:
-        grpc.Channel
+            self._prober = _Prober(self._endpoints, self._probe_interval, self._probe_timeout)
+            self._prober.start()
 
-    Raises:
-        IOError
-        SSLError
+    def _wait_ready(self, timeout: float):
+        """Wait for our servers to be ready, ejecting any that aren't.
 
-    """
-    credentials = grpc.ssl_channel_credentials(open(tls.cert).read())
+        Args:
+            timeout: seconds to wait in total
 
-    # create channel using ssl credentials
-    return grpc.secure_channel(
-        url, credentials, options=(
-            ('grpc.ssl_target_name_override', "ABCD",),
-        )
-    )
+        Raises:
+            NoServersError if no server is ready in time
+        """
+        # watch every server at once, so a dead one doesn't use up the others' time
+        futures = [(endpoint, endpoint.pool.ready_futures()) for endpoint in self._endpoints]
+        end = time.monotonic() + timeout
+        ready = False
+        for endpoint, pending in futures:
+            try:
+                for f in pending:
+                    f.result(timeout=max(0, end - time.monotonic()))
+                ready = True
+            except grpc.FutureTimeoutError:
+                endpoint.healthy = False
+                for f in pending:
+                    f.cancel()
+
+        if not ready:
+            self.close()
+            raise errors.NoServersError("Channel to %s not ready after %ss" % (
+                ", ".join(e.url for e in self._endpoints), timeout
+            ))
 
+    def close(self):
+        if self._prober:
+            self._prober.stop()
+            self._prober = None
 
-def _handle_rpc_error(func):
-    def fn(*args, **kwargs):
+        for endpoint in self._endpoints:
+            endpoint.pool.close()
+
+    @property
+    def in_flight(self) -> list:
+        """Return the number of calls in flight on each of our channels.
+
+        Returns:
+            []int
+        """
+        return [n for e in self._endpoints for n in e.pool.in_flight]
+
+    @property
+    def endpoints(self) -> list:
+        """Return what we know of each server we're balancing calls over.
+
+        Returns:
+            []dict
+        """
+        return [
+            {
+                "url": e.url,
+                "healthy": e.healthy,
+                "latency": e.latency,
+                "in_flight": e.pool.in_flight,
+            } for e in self._endpoints
+        ]
+
+    @property
+    def metrics(self) -> dict:
+        """Return what we know of our servers, how many reads shared another's call, if calls
+        are limited how long calls in each priority lane waited for a slot & if hedging, call
+        latency percentiles, how many calls were hedged & how many hedges won.
+
+        Returns:
+            dict
+        """
+        metrics = {"endpoints": self.endpoints, "coalesced": self._flights.report()}
+        if self._batcher:
+            metrics["batching"] = self._batcher.report()
+        if self._slots:
+            metrics["queue_wait"] = priority.report(self._slots.waits, [self._slots.waiting])
+        if self._hedger:
+            metrics["latency"] = self._hedger.latency.report()
+            metrics["hedging"] = self._hedger.report()
+        return metrics
+
+    def _pick(self) -> _Endpoint:
+        """Return the endpoint to send the next call to.
+
+        If every server has been ejected we try them all anyway.
+
+        Returns:
+            _Endpoint
+        """
+        if len(self._endpoints) == 1:
+            return self._endpoints[0]
+
+        healthy = [e for e in self._endpoints if e.healthy] or self._endpoints
+        return min(healthy, key=lambda e: e.score)
+
+    def _deadline(self):
+        """Return when a call starting now must finish by & the seconds it has.
+
+        Returns:
+            float or None, float or None (if calls have no time limit)
+
+        Raises:
+            DeadlineExceededError if the deadline has passed
+        """
+        timeout = deadline.timeout(self._timeout)
+        if timeout is None:
+            return None, None
+        return time.monotonic() + timeout, timeout
+
+    @staticmethod
+    def _left(end):
+        return None if end is None else max(0, end - time.monotonic())
+
+    def _acquire_slot(self, timeout: float):
+        """Wait for a slot for a call in the caller's priority lane, if calls are limited.
+
+        Args:
+            timeout: seconds to wait
+
+        Returns:
+            value to pass to _release_slot
+
+        Raises:
+            RequestTimeoutError if no slot is free in time
+        """
+        if not self._slots:
+            return None
+
+        slot = self._slots.acquire(priority.current(), timeout=timeout)
+        if slot is None:
+            raise errors.RequestTimeoutError("Timeout waiting for a free slot")
+        return slot
+
+    def _release_slot(self, slot):
+        if self._slots:
+            self._slots.release(slot)
+
+    def _call(self, rpc: str, request):
+        """Make a blocking call on the next channel from the pool.
+
+        Args:
+            rpc: name of the stub function to call
+            request: message to send
+
+        Returns:
+            reply message
+
+        Raises:
+            DeadlineExceededError if the deadline has passed
+        """
+        end, timeout = self._deadline()
+        slot = self._acquire_slot(timeout)
+        endpoint = self._pick()
+        channel = endpoint.pool.acquire()
         try:
-            return func(*args, **kwargs)
+            return getattr(channel.stub, rpc)(request, timeout=self._left(end))
         except grpc.RpcError as e:
-            error_data = json.loads(e.debug_error_string())
-            WysteriaConnectionBase.translate_server_exception(
-                error_data.get("grpc_message", str(e))
-            )
-    return fn
+            endpoint.observe(e)
+            raise
+        finally:
+            endpoint.pool.release(channel)
+            self._release_slot(slot)
 
+    def _future(self, rpc: str, request, handler, wait: bool=True) -> concurrent.futures.Future:
+        """Start a call on the next channel from the pool without waiting for the reply.
 
-class GRPCMiddleware(WysteriaConnectionBase):
-    """Wysteria middleware client using gRPC to manage transport.
+        Blocks only while waiting for a slot, if calls are limited.
 
-    """
-    def __init__(self, url, tls=None):
-        self._url = url
-        self._tls = tls
-        self._channel = None
-        self._stub = None
+        Args:
+            rpc: name of the stub function to call
+            request: message to send
+            handler: function to turn the reply into our result
+            wait: wait for a slot, otherwise raise RequestTimeoutError if none is free
 
-    def connect(self):
-        """Connect to the other end.
+        Returns:
+            concurrent.futures.Future
 
         """
-        if self._tls:
-            if self._tls.enable:
-                self._channel = grpc.secure_channel(self._url, self._tls)
-            else:
-                self._channel = grpc.insecure_channel(self._url)
-        else:
-            self._channel = grpc.insecure_channel(self._url)
+        result = concurrent.futures.Future()
+        end, timeout = self._deadline()
+        slot = self._acquire_slot(timeout if wait else 0)
+        endpoint = self._pick()
+        channel = endpoint.pool.acquire()
+        try:
+            call = getattr(channel.stub, rpc).future(request, timeout=self._left(end))
+        except Exception:
+            endpoint.pool.release(channel)
+            self._release_slot(slot)
+            raise
+
+        def on_done(f):
+            endpoint.pool.release(channel)
+            self._release_slot(slot)
+            if not f.cancelled():
+                endpoint.observe(f.exception())
+            if not result.set_running_or_notify_cancel():
+                return  # the caller cancelled the future
+
+            try:
+                result.set_result(handler(f.result()))
+            except grpc.RpcError as e:
+                try:
+                    _translate_rpc_error(e)
+                except Exception as err:
+                    result.set_exception(err)
+            except Exception as e:
+                result.set_exception(e)
+
+        def on_cancel(f):
+            if f.cancelled():
+                call.cancel()
+
+        result.add_done_callback(on_cancel)
+        call.add_done_callback(on_done)
+        return result
+
+    def _hedged(self, rpc: str, request, handler, subject: str=None):
+        """Make a call, sending a duplicate if it's slow, & return the first result.
+
+        Only for idempotent calls.
 
-        self._stub = stubs.WysteriaGrpcStub(self._channel)
+        Args:
+            rpc: name of the stub function to call
+            request: message to send
+            handler: function to turn the reply into our result
+            subject: subject to track latency under, if not the rpc
 
-    def close(self):
-        self._channel.close()
+        Returns:
+            ?
+        """
+        subject = subject or rpc
+        start = time.monotonic()
+        try:
+            result = self._hedger.run(
+                lambda: self._future(rpc, request, handler),
+                subject,
+                timeout=deadline.timeout(self._timeout),
+                hedge=lambda: self._future(rpc, request, handler, wait=False),
+            )
+        except concurrent.futures.TimeoutError as e:
+            raise errors.RequestTimeoutError("Timeout waiting for server reply. Original %s" % e)
+
+        self._hedger.latency.observe(subject, time.monotonic() - start)
+        return result
 
     @_handle_rpc_error
     def _generic_find(self, query, limit, offset, finder, decoder):
@@ -87,27 +1085,79 @@ class GRPCMiddleware(WysteriaConnectionBase):
             query: query object to encode
             limit: limit to apply
             offset: offset to apply
-            finder: function to call & pass query to
+            finder: name of the rpc to call & pass query to
             decoder: function to decode result objects
 
         Returns:
             list
 
         """
-        reply = finder(
-            pb.QueryDescs(
-                Limit=limit,
-                Offset=offset,
-                all=[self._encode_query_desc(q) for q in query if q.is_valid]
-            )
+        def send(query, limit, offset):
+            request = self._encode_query_descs(query, limit, offset)
+            if self._hedger:
+                return self._hedged(
+                    finder,
+                    request,
+                    lambda r: self._decode_results(r, decoder),
+                    latency.sized(finder, limit),
+                )
+            return self._decode_results(self._call(finder, request), decoder)
+
+        return self._cached_find(finder, query, limit, offset, send)
+
+    def _generic_find_async(self, query, limit, offset, finder, decoder):
+        """Start a generic wysteria query without blocking.
+
+        Args:
+            query: query object to encode
+            limit: limit to apply
+            offset: offset to apply
+            finder: name of the rpc to call & pass query to
+            decoder: function to decode result objects
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        find = lambda: self._future(
+            finder,
+            self._encode_query_descs(query, limit, offset),
+            lambda reply: self._decode_results(reply, decoder),
         )
+        if self.query_cache is None:
+            return find()
 
-        err = reply.error.Text
-        if err:
-            self.translate_server_exception(err)
+        key = self.query_cache.key(finder, query, limit, offset)
+        results = self.query_cache.lookup(key)
+        if results is not None:
+            future = concurrent.futures.Future()
+            future.set_result(results)
+            return future
 
-        return [decoder(i) for i in reply.all]
+        generation = self.query_cache.generation
+
+        def keep(f):
+            if not f.cancelled() and f.exception() is None:
+                self.query_cache.put(key, f.result(), generation)
+
+        future = find()
+        future.add_done_callback(keep)
+        return future
+
+    def _invalidating(self, future, oid: str=None) -> concurrent.futures.Future:
+        """Drop what a write may affect from our caches once it's done.
+
+        Args:
+            future: future of the write
+            oid: id of the object being changed, if any
 
+        Returns:
+            concurrent.futures.Future
+        """
+        future.add_done_callback(lambda _: self._invalidate(oid))
+        return future
+
+    @creates
     @_handle_rpc_error
     def _generic_create(self, obj, encoder, func):
         """
@@ -115,19 +1165,29 @@ class GRPCMiddleware(WysteriaConnectionBase):
         Args:
             obj: obj to encode
             encoder: function to do the encoding
-            func: function to call (create func)
+            func: name of the rpc to call (create func)
 
         Returns:
             str
 
         """
-        reply = func(encoder(obj))
-        err = reply.error.Text
-        if err:
-            self.translate_server_exception(err)
+        return self._decode_id(self._call(func, encoder(obj)))
 
-        return reply.Id
+    def _generic_create_async(self, obj, encoder, func):
+        """
+
+        Args:
+            obj: obj to encode
+            encoder: function to do the encoding
+            func: name of the rpc to call (create func)
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        return self._invalidating(self._future(func, encoder(obj), self._decode_id))
 
+    @invalidates
     @_handle_rpc_error
     def _generic_update(self, oid, facets, func):
         """
@@ -135,28 +1195,51 @@ class GRPCMiddleware(WysteriaConnectionBase):
         Args:
             oid: Id of obj to update
             facets: Facets to set
-            func: Update function to call
+            func: name of the update rpc to call
 
         """
-        result = func(pb.IdAndDict(Id=oid, Facets=facets))
-        err = result.Text
-        if err:
-            self.translate_server_exception(err)
+        self._check_text(self._call(func, pb.IdAndDict(Id=oid, Facets=facets)))
+
+    def _generic_update_async(self, oid, facets, func):
+        """
+
+        Args:
+            oid: Id of obj to update
+            facets: Facets to set
+            func: name of the update rpc to call
+
+        Returns:
+            concurrent.futures.Future
 
+        """
+        return self._invalidating(
+            self._future(func, pb.IdAndDict(Id=oid, Facets=facets), self._check_text), oid
+        )
+
+    @invalidates
     @_handle_rpc_error
     def _generic_delete(self, oid, func):
         """Call remote delete.
 
         Args:
             oid: id of obj to delete
-            func: delete function
+            func: name of the delete rpc
 
         """
-        result = func(pb.Id(Id=oid))
+        self._check_text(self._call(func, pb.Id(Id=oid)))
 
-        err = result.Text
-        if err:
-            self.translate_server_exception(err)
+    def _generic_delete_async(self, oid, func):
+        """Call remote delete without blocking.
+
+        Args:
+            oid: id of obj to delete
+            func: name of the delete rpc
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        return self._invalidating(self._future(func, pb.Id(Id=oid), self._check_text), oid)
 
     def find_collections(self, query, limit=_DEFAULT_LIMIT, offset=0):
         """Query server & return type appropriate matching results
@@ -171,13 +1254,31 @@ class GRPCMiddleware(WysteriaConnectionBase):
 
         Raises:
             Exception on network / server error
-
         """
         return self._generic_find(
             query,
             limit,
             offset,
-            self._stub.FindCollections,
+            "FindCollections",
+            self._decode_collection
+        )
+
+    def find_collections_async(self, query, limit=_DEFAULT_LIMIT, offset=0):
+        """Query server without blocking.
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            concurrent.futures.Future of []domain.Collection
+        """
+        return self._generic_find_async(
+            query,
+            limit,
+            offset,
+            "FindCollections",
             self._decode_collection
         )
 
@@ -199,7 +1300,26 @@ class GRPCMiddleware(WysteriaConnectionBase):
             query,
             limit,
             offset,
-            self._stub.FindItems,
+            "FindItems",
+            self._decode_item
+        )
+
+    def find_items_async(self, query, limit=_DEFAULT_LIMIT, offset=0):
+        """Query server without blocking.
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            concurrent.futures.Future of []domain.Item
+        """
+        return self._generic_find_async(
+            query,
+            limit,
+            offset,
+            "FindItems",
             self._decode_item
         )
 
@@ -221,7 +1341,26 @@ class GRPCMiddleware(WysteriaConnectionBase):
             query,
             limit,
             offset,
-            self._stub.FindVersions,
+            "FindVersions",
+            self._decode_version
+        )
+
+    def find_versions_async(self, query, limit=_DEFAULT_LIMIT, offset=0):
+        """Query server without blocking.
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            concurrent.futures.Future of []domain.Version
+        """
+        return self._generic_find_async(
+            query,
+            limit,
+            offset,
+            "FindVersions",
             self._decode_version
         )
 
@@ -243,7 +1382,26 @@ class GRPCMiddleware(WysteriaConnectionBase):
             query,
             limit,
             offset,
-            self._stub.FindResources,
+            "FindResources",
+            self._decode_resource
+        )
+
+    def find_resources_async(self, query, limit=_DEFAULT_LIMIT, offset=0):
+        """Query server without blocking.
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            concurrent.futures.Future of []domain.Resource
+        """
+        return self._generic_find_async(
+            query,
+            limit,
+            offset,
+            "FindResources",
             self._decode_resource
         )
 
@@ -265,10 +1423,31 @@ class GRPCMiddleware(WysteriaConnectionBase):
             query,
             limit,
             offset,
-            self._stub.FindLinks,
+            "FindLinks",
+            self._decode_link
+        )
+
+    def find_links_async(self, query, limit=_DEFAULT_LIMIT, offset=0):
+        """Query server without blocking.
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            concurrent.futures.Future of []domain.Link
+        """
+        return self._generic_find_async(
+            query,
+            limit,
+            offset,
+            "FindLinks",
             self._decode_link
         )
 
+    @coalesces
+    @_handle_rpc_error
     def get_published_version(self, oid):
         """Get the published version for the given Item id.
 
@@ -279,56 +1458,122 @@ class GRPCMiddleware(WysteriaConnectionBase):
             Version
 
         """
-        result = self._stub.PublishedVersion(pb.Id(Id=oid))
+        if self._hedger:
+            return self._hedged("PublishedVersion", pb.Id(Id=oid), self._decode_published)
 
-        err = result.error.Text
-        if err:
-            self.translate_server_exception(err)
+        return self._decode_published(self._call("PublishedVersion", pb.Id(Id=oid)))
+
+    def get_published_version_async(self, oid):
+        """Get the published version for the given Item id without blocking.
+
+        Args:
+            oid: id of parent Item
 
-        return self._decode_version(result)
+        Returns:
+            concurrent.futures.Future of Version
+
+        """
+        return self._future("PublishedVersion", pb.Id(Id=oid), self._decode_published)
 
+    @publishes
+    @_handle_rpc_error
     def publish_version(self, oid):
         """Publish the given version id.
 
         Args:
-            oid: id of version to set as published
+            oid: id of version to set as published
+
+        """
+        self._check_text(self._call("SetPublishedVersion", pb.Id(Id=oid)))
+
+    def publish_version_async(self, oid):
+        """Publish the given version id without blocking.
+
+        Args:
+            oid: id of version to set as published
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        version = self.cache.peek(oid) if self.cache is not None else None
+
+        def published(f):
+            self._invalidate(oid)
+            self._published(version if not f.cancelled() and f.exception() is None else None)
+
+        future = self._future("SetPublishedVersion", pb.Id(Id=oid), self._check_text)
+        future.add_done_callback(published)
+        return future
+
+    def update_collection_facets(self, oid, facets):
+        """Update facets of a given Collection.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        self._generic_update(oid, facets, "UpdateCollectionFacets")
+
+    def update_collection_facets_async(self, oid, facets):
+        """Update facets of a given Collection without blocking.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        return self._generic_update_async(oid, facets, "UpdateCollectionFacets")
+
+    def update_item_facets(self, oid, facets):
+        """Update facets of a given Item.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
 
         """
-        result = self._stub.SetPublishedVersion(pb.Id(Id=oid))
-
-        err = result.Text
-        if err:
-            self.translate_server_exception(err)
+        self._generic_update(oid, facets, "UpdateItemFacets")
 
-    def update_collection_facets(self, oid, facets):
-        """Update facets of a given Collection.
+    def update_item_facets_async(self, oid, facets):
+        """Update facets of a given Item without blocking.
 
         Args:
             oid: id of object to update
             facets: dictionary of facets to set
 
+        Returns:
+            concurrent.futures.Future
+
         """
-        self._generic_update(oid, facets, self._stub.UpdateCollectionFacets)
+        return self._generic_update_async(oid, facets, "UpdateItemFacets")
 
-    def update_item_facets(self, oid, facets):
-        """Update facets of a given Item.
+    def update_version_facets(self, oid, facets):
+        """Update facets of a given Version.
 
         Args:
             oid: id of object to update
             facets: dictionary of facets to set
 
         """
-        self._generic_update(oid, facets, self._stub.UpdateItemFacets)
+        self._generic_update(oid, facets, "UpdateVersionFacets")
 
-    def update_version_facets(self, oid, facets):
-        """Update facets of a given Version.
+    def update_version_facets_async(self, oid, facets):
+        """Update facets of a given Version without blocking.
 
         Args:
             oid: id of object to update
             facets: dictionary of facets to set
 
+        Returns:
+            concurrent.futures.Future
+
         """
-        self._generic_update(oid, facets, self._stub.UpdateVersionFacets)
+        return self._generic_update_async(oid, facets, "UpdateVersionFacets")
 
     def update_resource_facets(self, oid, facets):
         """Update facets of a given Resource.
@@ -338,7 +1583,20 @@ class GRPCMiddleware(WysteriaConnectionBase):
             facets: dictionary of facets to set
 
         """
-        self._generic_update(oid, facets, self._stub.UpdateResourceFacets)
+        self._generic_update(oid, facets, "UpdateResourceFacets")
+
+    def update_resource_facets_async(self, oid, facets):
+        """Update facets of a given Resource without blocking.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        Returns:
+            concurrent.futures.Future
+
+        """
+        return self._generic_update_async(oid, facets, "UpdateResourceFacets")
 
     def update_link_facets(self, oid, facets):
         """Update facets of a given Link.
@@ -348,344 +1606,245 @@ class GRPCMiddleware(WysteriaConnectionBase):
             facets: dictionary of facets to set
 
         """
-        self._generic_update(oid, facets, self._stub.UpdateLinkFacets)
+        self._generic_update(oid, facets, "UpdateLinkFacets")
 
-    def create_collection(self, collection):
-        """Create a Collection.
+    def update_link_facets_async(self, oid, facets):
+        """Update facets of a given Link without blocking.
 
         Args:
-            collection:
+            oid: id of object to update
+            facets: dictionary of facets to set
 
         Returns:
-            str
+            concurrent.futures.Future
 
         """
-        return self._generic_create(
-            collection, self._encode_collection, self._stub.CreateCollection
-        )
+        return self._generic_update_async(oid, facets, "UpdateLinkFacets")
 
-    def create_item(self, item):
-        """Create a Item.
+    def create_collection(self, collection):
+        """Create a Collection.
 
         Args:
-            item:
+            collection:
 
         Returns:
             str
 
         """
         return self._generic_create(
-            item, self._encode_item, self._stub.CreateItem
+            collection, self._encode_collection, "CreateCollection"
         )
 
-    def create_version(self, version):
-        """Create a Version.
+    def create_collection_async(self, collection):
+        """Create a Collection without blocking.
 
         Args:
-            version:
+            collection:
 
         Returns:
-            str, int
+            concurrent.futures.Future of str
 
         """
-        reply = self._stub.CreateVersion(self._encode_version(version))
-
-        err = reply.Text
-        if err:
-            self.translate_server_exception(err)
-
-        return reply.Id, reply.Version
+        return self._generic_create_async(
+            collection, self._encode_collection, "CreateCollection"
+        )
 
-    def create_resource(self, resource):
-        """Create a Resource.
+    def create_item(self, item):
+        """Create a Item.
 
         Args:
-            resource:
+            item:
 
         Returns:
             str
 
         """
         return self._generic_create(
-            resource, self._encode_resource, self._stub.CreateResource
+            item, self._encode_item, "CreateItem"
         )
 
-    def create_link(self, link):
-        """Create a Link.
+    def create_item_async(self, item):
+        """Create a Item without blocking.
 
         Args:
-            link:
+            item:
 
         Returns:
-            str
+            concurrent.futures.Future of str
 
         """
-        return self._generic_create(
-            link, self._encode_link, self._stub.CreateLink
+        return self._generic_create_async(
+            item, self._encode_item, "CreateItem"
         )
 
-    def delete_collection(self, oid):
-        """Delete collection.
+    @creates
+    @_handle_rpc_error
+    def create_version(self, version):
+        """Create a Version.
 
         Args:
-            oid: id of obj to delete
-
-        """
-        self._generic_delete(oid, self._stub.DeleteCollection)
-
-    def delete_item(self, oid):
-        """Delete item.
+            version:
 
-        Args:
-            oid: id of obj to delete
+        Returns:
+            str, int
 
         """
-        self._generic_delete(oid, self._stub.DeleteItem)
+        reply = self._call("CreateVersion", self._encode_version(version))
+        return self._decode_id_and_num(reply)
 
-    def delete_version(self, oid):
-        """Delete version.
+    def create_version_async(self, version):
+        """Create a Version without blocking.
 
         Args:
-            oid: id of obj to delete
-
-        """
-        self._generic_delete(oid, self._stub.DeleteVersion)
-
-    def delete_resource(self, oid):
-        """Delete resource.
+            version:
 
-        Args:
-            oid: id of obj to delete
+        Returns:
+            concurrent.futures.Future of str, int
 
         """
-        self._generic_delete(oid, self._stub.DeleteResource)
+        return self._invalidating(self._future(
+            "CreateVersion", self._encode_version(version), self._decode_id_and_num
+        ))
 
-    # -- Encoders
-    def _encode_query_desc(self, q: domain.QueryDesc):
-        """
+    def create_resource(self, resource):
+        """Create a Resource.
 
         Args:
-            q: domain.QueryDesc
+            resource:
 
         Returns:
-            pb.QueryDesc
+            str
+
         """
-        return pb.QueryDesc(
-            Parent=q._parent,
-            Id=q._id,
-            Uri=q._uri,
-            VersionNumber=q._versionnumber,
-            ItemType=q._itemtype,
-            Variant=q._variant,
-            Facets=self._encode_dict(q._facets),
-            Name=q._name,
-            ResourceType=q._resourcetype,
-            Location=q._location,
-            LinkSrc=q._linksrc,
-            LinkDst=q._linkdst,
+        return self._generic_create(
+            resource, self._encode_resource, "CreateResource"
         )
 
-    def _encode_collection(self, o: domain.Collection):
-        """
+    def create_resource_async(self, resource):
+        """Create a Resource without blocking.
 
         Args:
-            o: domain.Collection
+            resource:
 
         Returns:
-            pb.Collection
+            concurrent.futures.Future of str
 
         """
-        return pb.Collection(
-            Parent=o.parent,
-            Id=o.id,
-            Uri=o._uri,
-            Name=o.name,
-            Facets=self._encode_dict(o.facets),
+        return self._generic_create_async(
+            resource, self._encode_resource, "CreateResource"
         )
 
-    def _encode_item(self, o: domain.Item):
-        """
+    def create_link(self, link):
+        """Create a Link.
 
         Args:
-            o: domain.Item
+            link:
 
         Returns:
-            pb.Item
+            str
 
         """
-        return pb.Item(
-            Parent=o.parent,
-            Id=o.id,
-            Uri=o._uri,
-            ItemType=o.item_type,
-            Variant=o.variant,
-            Facets=self._encode_dict(o.facets),
+        return self._generic_create(
+            link, self._encode_link, "CreateLink"
         )
 
-    def _encode_version(self, o: domain.Version):
-        """
+    def create_link_async(self, link):
+        """Create a Link without blocking.
 
         Args:
-            o: domain.version
+            link:
 
         Returns:
-            pb.version
+            concurrent.futures.Future of str
 
         """
-        return pb.Version(
-            Parent=o.parent,
-            Id=o.id,
-            Uri=o._uri,
-            Number=o._number,
-            Facets=self._encode_dict(o.facets),
+        return self._generic_create_async(
+            link, self._encode_link, "CreateLink"
         )
 
-    def _encode_resource(self, o: domain.Resource):
-        """
+    def delete_collection(self, oid):
+        """Delete collection.
 
         Args:
-            o: domain.Resource
-
-        Returns:
-            pb.Resource
+            oid: id of obj to delete
 
         """
-        return pb.Resource(
-            Parent=o.parent,
-            Id=o.id,
-            Uri=o._uri,
-            Name=o.name,
-            ResourceType=o.resource_type,
-            Location=o.location,
-            Facets=self._encode_dict(o.facets),
-        )
+        self._generic_delete(oid, "DeleteCollection")
 
-    def _encode_link(self, o: domain.Link):
-        """
+    def delete_collection_async(self, oid):
+        """Delete collection without blocking.
 
         Args:
-            o: domain.Link
+            oid: id of obj to delete
 
         Returns:
-            pb.Link
+            concurrent.futures.Future
 
         """
-        return pb.Link(
-            Id=o.id,
-            Uri=o._uri,
-            Src=o.source,
-            Dst=o.destination,
-            Name=o.name,
-            Facets=self._encode_dict(o.facets),
-        )
+        return self._generic_delete_async(oid, "DeleteCollection")
 
-    @staticmethod
-    def _encode_dict(data: dict):
-        s = Struct()
-        for key, value in data.items():
-            s.update({str(key): str(value)})
-        return s
+    def delete_item(self, oid):
+        """Delete item.
+
+        Args:
+            oid: id of obj to delete
 
-    # -- Decoders
-    def _decode_collection(self, o: pb.Collection):
         """
+        self._generic_delete(oid, "DeleteItem")
+
+    def delete_item_async(self, oid):
+        """Delete item without blocking.
 
         Args:
-            o: pb.Collection
+            oid: id of obj to delete
 
         Returns:
-            domain.Collection
+            concurrent.futures.Future
 
         """
-        return domain.Collection(
-            self,
-            id=o.Id,
-            uri=o.Uri,
-            name=o.Name,
-            parent=o.Parent,
-            facets=dict(o.Facets or {}),
-        )
+        return self._generic_delete_async(oid, "DeleteItem")
 
-    def _decode_item(self, o: pb.Item):
-        """
+    def delete_version(self, oid):
+        """Delete version.
 
         Args:
-            o: pb.Item
-
-        Returns:
-            domain.Item
+            oid: id of obj to delete
 
         """
-        return domain.Item(
-            self,
-            id=o.Id,
-            uri=o.Uri,
-            parent=o.Parent,
-            facets=dict(o.Facets or {}),
-            itemtype=o.ItemType,
-            variant=o.Variant,
-        )
+        self._generic_delete(oid, "DeleteVersion")
 
-    def _decode_version(self, o: pb.Version):
-        """
+    def delete_version_async(self, oid):
+        """Delete version without blocking.
 
         Args:
-            o: pb.Version
+            oid: id of obj to delete
 
         Returns:
-            domain.Version
+            concurrent.futures.Future
 
         """
-        return domain.Version(
-            self,
-            id=o.Id,
-            uri=o.Uri,
-            parent=o.Parent,
-            facets=dict(o.Facets or {}),
-            number=o.Number,
-        )
+        return self._generic_delete_async(oid, "DeleteVersion")
 
-    def _decode_resource(self, o: pb.Resource):
-        """
+    def delete_resource(self, oid):
+        """Delete resource.
 
         Args:
-            o: pb.Resource
-
-        Returns:
-            domain.Resource
+            oid: id of obj to delete
 
         """
-        return domain.Resource(
-            self,
-            parent=o.Parent,
-            name=o.Name,
-            resourcetype=o.ResourceType,
-            id=o.Id,
-            uri=o.Uri,
-            facets=dict(o.Facets or {}),
-            location=o.Location,
-        )
+        self._generic_delete(oid, "DeleteResource")
 
-    def _decode_link(self, o: pb.Link):
-        """
+    def delete_resource_async(self, oid):
+        """Delete resource without blocking.
 
         Args:
-            o: pb.Link
+            oid: id of obj to delete
 
         Returns:
-            domain.Link
+            concurrent.futures.Future
 
         """
-        return domain.Link(
-            self,
-            name=o.Name,
-            id=o.Id,
-            uri=o.Uri,
-            facets=dict(o.Facets or {}),
-            src=o.Src,
-            dst=o.Dst,
-        )
-
+        return self._generic_delete_async(oid, "DeleteResource")
 
 if __name__ == "__main__":
     from wysteria.utils import from_config
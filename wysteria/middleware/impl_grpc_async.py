@@ -0,0 +1,519 @@
+import asyncio
+import time
+
+import grpc
+from grpc import aio
+
+from wysteria import errors
+from wysteria.middleware import deadline
+from wysteria.middleware import impl_grpc
+from wysteria.middleware import latency
+from wysteria.middleware.wgrpc import stubs
+from wysteria.middleware.wgrpc.wysteria import grpc_pb2 as pb
+
+
+def _get_secure_channel(url, tls, options: list=None, compression=None):
+    """Return secure asyncio channel to server.
+
+    Args:
+        url: host/port info of server
+        tls: namedtuple of tls settings
+        options: extra channel arguments (see impl_grpc._channel_options)
+        compression: grpc.Compression to use on the channel
+
+    Returns:
+        grpc.aio.Channel
+
+    Raises:
+        IOError
+        SSLError
+
+    """
+    with open(tls.cert, "rb") as f:
+        credentials = grpc.ssl_channel_credentials(f.read())
+
+    return aio.secure_channel(
+        url,
+        credentials,
+        options=[('grpc.ssl_target_name_override', "ABCD",)] + (options or []),
+        compression=compression,
+    )
+
+
+def _handle_rpc_error(func):
+    async def fn(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except grpc.RpcError as e:
+            impl_grpc._translate_rpc_error(e)
+    return fn
+
+
+class AsyncGRPCMiddleware(impl_grpc._GRPCCodec):
+    """Wysteria middleware client using grpc.aio on the caller's asyncio event loop.
+
+    This has the same operations as GRPCMiddleware, but each is a coroutine. Calls are
+    multiplexed over a single channel, so hundreds can be in flight at once with asyncio.gather.
+
+    Calls made within a deadline (see deadline.within) are given the time remaining,
+    otherwise each call is given `timeout` seconds.
+
+    Nb. Domain objects returned are bound to this middleware, their helper functions that
+    talk to the server (eg. Item.create_version) expect a synchronous middleware. Call the
+    coroutines here directly instead.
+
+    """
+    def __init__(
+        self,
+        url: str=None,
+        tls=None,
+        max_send_message_size: int=None,
+        max_receive_message_size: int=None,
+        keepalive_time: float=None,
+        keepalive_timeout: float=None,
+        compression: str=None,
+        ready_timeout: float=None,
+        lazy: bool=False,
+        hedge: bool=False,
+        hedge_ratio: float=latency._DEFAULT_HEDGE_RATIO,
+        timeout: float=None,
+    ):
+        """
+
+        Args:
+            url (str): host/port info of server
+            tls: namedtuple of tls settings
+            max_send_message_size (int): largest message we'll send, in bytes
+            max_receive_message_size (int): largest reply we'll accept, in bytes
+            keepalive_time (float): seconds between keepalive pings, keeps idle channels alive
+            keepalive_timeout (float): seconds to wait for a ping ack before giving up
+            compression (str): "gzip" or "deflate" to compress messages
+            ready_timeout (float): if set, connect() waits until the channel is ready
+                or this many seconds have passed
+            lazy (bool): if set, results read their fields from the reply only when accessed.
+                Cheaper if you only need some fields of large results.
+            hedge (bool): if set, finds that are slower than usual (p95) are sent again &
+                the first reply is used
+            hedge_ratio (float): max hedges to send per call, caps the extra load hedging
+                puts on the server
+            timeout (float): seconds each call is allowed when no deadline is set, by
+                default calls wait as long as it takes
+        """
+        self._lazy = lazy
+        self._timeout = timeout
+        self._hedger = latency.Hedger(latency.LatencyTracker(), hedge_ratio) if hedge else None
+        self._url = url or impl_grpc._DEFAULT_URI
+        self._tls = tls
+        self._options = impl_grpc._channel_options(
+            max_send_message_size=max_send_message_size,
+            max_receive_message_size=max_receive_message_size,
+            keepalive_time=keepalive_time,
+            keepalive_timeout=keepalive_timeout,
+        )
+        self._compression = impl_grpc._compression(compression)
+        self._ready_timeout = ready_timeout
+        self._channel = None
+        self._stub = None
+
+    async def connect(self):
+        """Connect to the other end.
+
+        Raises:
+            NoServersError if a ready_timeout is set & the channel isn't ready in time
+        """
+        if self._tls and self._tls.enable:
+            self._channel = _get_secure_channel(
+                self._url, self._tls, options=self._options, compression=self._compression
+            )
+        else:
+            self._channel = aio.insecure_channel(
+                self._url, options=self._options, compression=self._compression
+            )
+
+        self._stub = stubs.WysteriaGrpcStub(self._channel)
+
+        if self._ready_timeout is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._channel.channel_ready(), self._ready_timeout)
+        except asyncio.TimeoutError:
+            await self._channel.close()
+            raise errors.NoServersError(
+                "Channel to %s not ready after %ss" % (self._url, self._ready_timeout)
+            )
+
+    async def close(self):
+        await self._channel.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def metrics(self) -> dict:
+        """Return call latency percentiles, how many calls were hedged & how many hedges won.
+
+        Returns:
+            dict
+        """
+        if not self._hedger:
+            return {}
+        return {"latency": self._hedger.latency.report(), "hedging": self._hedger.report()}
+
+    async def _unary(self, func, request):
+        """Make a call, giving it no longer than the time allowed.
+
+        Args:
+            func: stub function to call
+            request: message to send
+
+        Returns:
+            reply message
+
+        Raises:
+            DeadlineExceededError if the deadline has passed
+        """
+        return await func(request, timeout=deadline.timeout(self._timeout))
+
+    async def _idempotent_call(self, rpc: str, request, subject: str=None):
+        """Make a call, sending a duplicate if it's slow & hedging is enabled.
+
+        Args:
+            rpc: name of the stub function to call
+            request: message to send
+            subject: subject to track latency under, if not the rpc
+
+        Returns:
+            reply message
+        """
+        func = getattr(self._stub, rpc)
+        if not self._hedger:
+            return await self._unary(func, request)
+        subject = subject or rpc
+
+        start = time.monotonic()
+        timeout = deadline.timeout(self._timeout)
+        try:
+            reply = await self._hedger.run_async(
+                lambda: func(request, timeout=timeout), subject, timeout=timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise errors.RequestTimeoutError("Timeout waiting for server reply. Original %s" % e)
+
+        self._hedger.latency.observe(subject, time.monotonic() - start)
+        return reply
+
+    @_handle_rpc_error
+    async def _generic_find(self, query, limit, offset, finder, decoder):
+        """Perform a generic wysteria query.
+
+        Args:
+            query: query object to encode
+            limit: limit to apply
+            offset: offset to apply
+            finder: name of the rpc to call & pass query to
+            decoder: function to decode result objects
+
+        Returns:
+            list
+
+        """
+        reply = await self._idempotent_call(
+            finder, self._encode_query_descs(query, limit, offset), latency.sized(finder, limit)
+        )
+        return self._decode_results(reply, decoder)
+
+    @_handle_rpc_error
+    async def _generic_create(self, obj, encoder, func):
+        """
+
+        Args:
+            obj: obj to encode
+            encoder: function to do the encoding
+            func: function to call (create func)
+
+        Returns:
+            str
+
+        """
+        return self._decode_id(await self._unary(func, encoder(obj)))
+
+    @_handle_rpc_error
+    async def _generic_update(self, oid, facets, func):
+        """
+
+        Args:
+            oid: Id of obj to update
+            facets: Facets to set
+            func: Update function to call
+
+        """
+        self._check_text(await self._unary(func, pb.IdAndDict(Id=oid, Facets=facets)))
+
+    @_handle_rpc_error
+    async def _generic_delete(self, oid, func):
+        """Call remote delete.
+
+        Args:
+            oid: id of obj to delete
+            func: delete function
+
+        """
+        self._check_text(await self._unary(func, pb.Id(Id=oid)))
+
+    async def find_collections(self, query, limit=impl_grpc._DEFAULT_LIMIT, offset=0):
+        """Query server & return type appropriate matching results
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            []domain.Collection
+
+        """
+        return await self._generic_find(
+            query, limit, offset, "FindCollections", self._decode_collection
+        )
+
+    async def find_items(self, query, limit=impl_grpc._DEFAULT_LIMIT, offset=0):
+        """Query server & return type appropriate matching results
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            []domain.Item
+        """
+        return await self._generic_find(
+            query, limit, offset, "FindItems", self._decode_item
+        )
+
+    async def find_versions(self, query, limit=impl_grpc._DEFAULT_LIMIT, offset=0):
+        """Query server & return type appropriate matching results
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            []domain.Version
+        """
+        return await self._generic_find(
+            query, limit, offset, "FindVersions", self._decode_version
+        )
+
+    async def find_resources(self, query, limit=impl_grpc._DEFAULT_LIMIT, offset=0):
+        """Query server & return type appropriate matching results
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            []domain.Resource
+        """
+        return await self._generic_find(
+            query, limit, offset, "FindResources", self._decode_resource
+        )
+
+    async def find_links(self, query, limit=impl_grpc._DEFAULT_LIMIT, offset=0):
+        """Query server & return type appropriate matching results
+
+        Args:
+            query ([]domain.QueryDesc): search query(ies) to execute
+            limit (int): limit number of returned results
+            offset (int): return results starting from some offset
+
+        Returns:
+            []domain.Link
+        """
+        return await self._generic_find(
+            query, limit, offset, "FindLinks", self._decode_link
+        )
+
+    @_handle_rpc_error
+    async def get_published_version(self, oid):
+        """Get the published version for the given Item id.
+
+        Args:
+            oid: id of parent Item
+
+        Returns:
+            Version
+
+        """
+        return self._decode_published(
+            await self._idempotent_call("PublishedVersion", pb.Id(Id=oid))
+        )
+
+    @_handle_rpc_error
+    async def publish_version(self, oid):
+        """Publish the given version id.
+
+        Args:
+            oid: id of version to set as published
+
+        """
+        self._check_text(await self._unary(self._stub.SetPublishedVersion, pb.Id(Id=oid)))
+
+    async def update_collection_facets(self, oid, facets):
+        """Update facets of a given Collection.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        await self._generic_update(oid, facets, self._stub.UpdateCollectionFacets)
+
+    async def update_item_facets(self, oid, facets):
+        """Update facets of a given Item.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        await self._generic_update(oid, facets, self._stub.UpdateItemFacets)
+
+    async def update_version_facets(self, oid, facets):
+        """Update facets of a given Version.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        await self._generic_update(oid, facets, self._stub.UpdateVersionFacets)
+
+    async def update_resource_facets(self, oid, facets):
+        """Update facets of a given Resource.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        await self._generic_update(oid, facets, self._stub.UpdateResourceFacets)
+
+    async def update_link_facets(self, oid, facets):
+        """Update facets of a given Link.
+
+        Args:
+            oid: id of object to update
+            facets: dictionary of facets to set
+
+        """
+        await self._generic_update(oid, facets, self._stub.UpdateLinkFacets)
+
+    async def create_collection(self, collection):
+        """Create a Collection.
+
+        Args:
+            collection:
+
+        Returns:
+            str
+
+        """
+        return await self._generic_create(
+            collection, self._encode_collection, self._stub.CreateCollection
+        )
+
+    async def create_item(self, item):
+        """Create a Item.
+
+        Args:
+            item:
+
+        Returns:
+            str
+
+        """
+        return await self._generic_create(item, self._encode_item, self._stub.CreateItem)
+
+    @_handle_rpc_error
+    async def create_version(self, version):
+        """Create a Version.
+
+        Args:
+            version:
+
+        Returns:
+            str, int
+
+        """
+        reply = await self._unary(self._stub.CreateVersion, self._encode_version(version))
+        return self._decode_id_and_num(reply)
+
+    async def create_resource(self, resource):
+        """Create a Resource.
+
+        Args:
+            resource:
+
+        Returns:
+            str
+
+        """
+        return await self._generic_create(
+            resource, self._encode_resource, self._stub.CreateResource
+        )
+
+    async def create_link(self, link):
+        """Create a Link.
+
+        Args:
+            link:
+
+        Returns:
+            str
+
+        """
+        return await self._generic_create(link, self._encode_link, self._stub.CreateLink)
+
+    async def delete_collection(self, oid):
+        """Delete collection.
+
+        Args:
+            oid: id of obj to delete
+
+        """
+        await self._generic_delete(oid, self._stub.DeleteCollection)
+
+    async def delete_item(self, oid):
+        """Delete item.
+
+        Args:
+            oid: id of obj to delete
+
+        """
+        await self._generic_delete(oid, self._stub.DeleteItem)
+
+    async def delete_version(self, oid):
+        """Delete version.
+
+        Args:
+            oid: id of obj to delete
+
+        """
+        await self._generic_delete(oid, self._stub.DeleteVersion)
+
+    async def delete_resource(self, oid):
+        """Delete resource.
+
+        Args:
+            oid: id of obj to delete
+
+        """
+        await self._generic_delete(oid, self._stub.DeleteResource)
@@ -0,0 +1,433 @@
+"""Adaptive timeouts, retry pacing & request hedging for middleware requests.
+
+Request latency is tracked per subject (route), & for finds per size of page asked for.
+Timeouts are derived from what we've seen rather than fixed, retries back off exponentially
+with jitter & a retry budget stops us piling retries onto a server that is already
+struggling. Slow idempotent requests may be hedged: a duplicate is sent & whichever reply
+comes first is used.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+
+from wysteria.middleware import deadline
+
+
+_DEFAULT_MIN_TIMEOUT = 0.5  # seconds
+_DEFAULT_MAX_TIMEOUT = 60  # seconds
+
+_SAMPLES = 256  # latencies kept per subject
+_MIN_SAMPLES = 20  # latencies we need before we trust our percentiles over the default
+_RECOMPUTE_EVERY = 16  # observations between refreshing a subject's percentiles
+_TIMEOUT_PERCENTILE = 99
+_TIMEOUT_MULTIPLIER = 3  # timeout is this many times the percentile above
+
+_BACKOFF_BASE = 0.05  # seconds
+_BACKOFF_CAP = 2  # seconds
+
+# retry budget, as in gRPC's retry throttling: failures cost a token, successes earn back a
+# fraction of one & retries are only allowed while we have over half our tokens.
+_BUDGET_TOKENS = 10
+_BUDGET_RATIO = 0.2
+
+_HEDGE_PERCENTILE = 95  # a request is hedged once it's taken longer than this percentile
+_DEFAULT_HEDGE_RATIO = 0.05  # max hedges sent per request, so at most 5% extra load
+_HEDGE_BURST = 10  # max hedges that can be sent back to back
+
+# finds are tracked per size of page asked for, as a page of 1000 takes far longer than 1
+_SIZE_BUCKETS = (1, 10, 100, 1000)
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Return the given percentile of some samples (nearest rank).
+
+    Args:
+        samples: sorted list of numbers
+        pct: 0 -> 100
+
+    Returns:
+        float
+    """
+    if not samples:
+        return 0.0
+    index = int(round(pct / 100.0 * (len(samples) - 1)))
+    return samples[index]
+
+
+def sized(subject: str, size: int) -> str:
+    """Return the subject to track latency of a request for `size` results under.
+
+    Args:
+        subject: subject (route) the request is sent to
+        size: max results asked for (eg. a find's limit), 0 or less for no limit
+
+    Returns:
+        str
+    """
+    for bucket in _SIZE_BUCKETS:
+        if 0 < size <= bucket:
+            return "%s[%d]" % (subject, bucket)
+    return "%s[*]" % subject
+
+
+def backoff(attempt: int, base: float=_BACKOFF_BASE, cap: float=_BACKOFF_CAP) -> float:
+    """Return seconds to wait before a retry, exponential with full jitter.
+
+    Args:
+        attempt: number of attempts made so far (from 0)
+        base: seconds to wait (at most) before the first retry
+        cap: max seconds to wait
+
+    Returns:
+        float
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Keeps recent latencies of requests to each subject.
+
+    Thread safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # subject -> deque of latencies in seconds
+        self._counts = collections.Counter()  # subject -> observations
+        self._sorted = {}  # subject -> sorted copy of samples, refreshed periodically
+
+    def observe(self, subject: str, seconds: float):
+        """Record how long a successful request took.
+
+        Args:
+            subject: subject (route) the request was sent to
+            seconds: how long the reply took
+        """
+        with self._lock:
+            samples = self._samples.get(subject)
+            if samples is None:
+                samples = self._samples[subject] = collections.deque(maxlen=_SAMPLES)
+            samples.append(seconds)
+
+            self._counts[subject] += 1
+            if len(samples) >= _MIN_SAMPLES and not self._counts[subject] % _RECOMPUTE_EVERY:
+                self._sorted[subject] = sorted(samples)
+
+    def percentile(self, subject: str, pct: float):
+        """Return the given percentile of a subject's latency.
+
+        Args:
+            subject: subject (route) requests are sent to
+            pct: 0 -> 100
+
+        Returns:
+            float (seconds) or None if we haven't seen enough requests to say
+        """
+        samples = self._sorted.get(subject)
+        if samples is None:
+            return None
+        return percentile(samples, pct)
+
+    def report(self) -> dict:
+        """Return latency percentiles of each subject.
+
+        Returns:
+            dict
+        """
+        with self._lock:
+            samples = {subject: sorted(s) for subject, s in self._samples.items()}
+
+        return {
+            subject: {
+                "p50": percentile(s, 50),
+                "p90": percentile(s, 90),
+                "p99": percentile(s, 99),
+            } for subject, s in samples.items()
+        }
+
+
+class RequestPolicy:
+    """Decides how long requests may take & whether & when failed requests are retried.
+
+    Thread safe, shared by all requests made by a middleware.
+    """
+    def __init__(
+        self,
+        min_timeout: float=_DEFAULT_MIN_TIMEOUT,
+        max_timeout: float=_DEFAULT_MAX_TIMEOUT,
+        retries: int=3,
+    ):
+        """
+
+        Args:
+            min_timeout: shortest timeout we'll derive for a subject, in seconds (requests
+                may ask for a longer one)
+            max_timeout: longest timeout we'll derive for a subject, in seconds
+            retries: max times to retry a request
+        """
+        self.latency = LatencyTracker()
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._retries = retries
+        self._lock = threading.Lock()
+        self._tokens = _BUDGET_TOKENS
+
+    def timeout(self, subject: str, default: float, attempt: int=0) -> float:
+        """Return the timeout to give a request.
+
+        Doubled for each retry, up to our max timeout, so a server that has slowed down
+        past what we've seen can still reply. Never longer than the time left before the
+        current deadline, if one is set.
+
+        Args:
+            subject: subject (route) the request is sent to
+            default: timeout to use until we've seen enough replies on the subject, & the
+                shortest timeout we'll derive for it
+            attempt: number of attempts made so far (from 0)
+
+        Returns:
+            float
+
+        Raises:
+            DeadlineExceededError if the deadline has passed
+        """
+        timeout = self._derived(subject, default)
+        if attempt:
+            timeout = max(timeout, min(self._max_timeout, timeout * (2 ** attempt)))
+        return deadline.timeout(timeout)
+
+    def _derived(self, subject: str, default: float) -> float:
+        p = self.latency.percentile(subject, _TIMEOUT_PERCENTILE)
+        if p is None:
+            return default
+        floor = self._min_timeout if default is None else max(self._min_timeout, default)
+        return min(self._max_timeout, max(floor, p * _TIMEOUT_MULTIPLIER))
+
+    def observe(self, subject: str, seconds: float):
+        """Record a successful request.
+
+        Args:
+            subject: subject (route) the request was sent to
+            seconds: how long the reply took
+        """
+        with self._lock:
+            self._tokens = min(_BUDGET_TOKENS, self._tokens + _BUDGET_RATIO)
+        self.latency.observe(subject, seconds)
+
+    def timed_out(self, subject: str, seconds: float):
+        """Record a request that got no reply in time.
+
+        It's counted as a request that took as long as it was given, so a server that slows
+        down past our timeout raises the timeouts we derive rather than going unseen.
+
+        Args:
+            subject: subject (route) the request was sent to
+            seconds: how long the request was given
+        """
+        self.latency.observe(subject, seconds)
+
+    def retry_delay(self, attempt: int):
+        """Record a failed request, returning how long to wait before retrying it.
+
+        Args:
+            attempt: number of attempts made so far (from 0)
+
+        Returns:
+            float or None if the request shouldn't be retried
+        """
+        with self._lock:
+            self._tokens = max(0, self._tokens - 1)
+            if attempt >= self._retries or self._tokens <= _BUDGET_TOKENS / 2:
+                return None
+
+        delay = backoff(attempt)
+        left = deadline.remaining()
+        if left is not None and left <= delay:
+            return None  # we'd run out of time before we could send it
+        return delay
+
+    def report(self) -> dict:
+        """Return latency percentiles & the current timeout of each subject.
+
+        Returns:
+            dict
+        """
+        report = self.latency.report()
+        for subject, latency in report.items():
+            latency["timeout"] = self._derived(subject, None)
+        return report
+
+
+class Hedger:
+    """Sends a duplicate (hedge) of a request that is slower than usual, taking whichever
+    reply comes first.
+
+    Hedges are paid for from a budget that earns `ratio` of a hedge for every request, so
+    hedging never adds more than that fraction to the load on the server.
+
+    Thread safe.
+    """
+    def __init__(self, latency: LatencyTracker, ratio: float=_DEFAULT_HEDGE_RATIO):
+        """
+
+        Args:
+            latency: latencies to decide when a request is slow
+            ratio: max hedges to send per request
+        """
+        self.latency = latency
+        self._ratio = ratio
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0  # hedges that replied before the original request
+
+    def _delay(self, subject: str):
+        """Note a request is being sent, returning how long until it should be hedged.
+
+        Args:
+            subject: subject (route) the request is sent to
+
+        Returns:
+            float or None if it shouldn't be hedged
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(_HEDGE_BURST, self._tokens + self._ratio)
+        return self.latency.percentile(subject, _HEDGE_PERCENTILE)
+
+    def _allow(self) -> bool:
+        """Return if we can afford to send a hedge, paying for it if so.
+
+        Returns:
+            bool
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def _refund(self):
+        """Give back the hedge paid for by _allow(), it couldn't be sent.
+        """
+        with self._lock:
+            self._tokens = min(_HEDGE_BURST, self._tokens + 1)
+            self.hedges -= 1
+
+    def _won(self):
+        with self._lock:
+            self.wins += 1
+
+    def run(self, start, subject: str, timeout: float=None, hedge=None):
+        """Start a request, hedging it if it's slow, & return the first successful result.
+
+        Args:
+            start: function () -> concurrent.futures.Future, sends the request
+            subject: subject (route) the request is sent to
+            timeout: seconds to wait for a result
+            hedge: function () -> concurrent.futures.Future, sends the hedge. It should
+                raise rather than wait if it can't be sent at once (eg. no slot is free),
+                the hedge is then skipped. By default `start`.
+
+        Returns:
+            ?
+
+        Raises:
+            concurrent.futures.TimeoutError if there's no result in time
+            the error of the original request, if all requests failed
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        delay = self._delay(subject)
+
+        first = start()
+        pending = {first}
+        try:
+            # no point hedging a request that will have timed out before the hedge is due
+            if delay is not None and (end is None or end - time.monotonic() > delay):
+                done, _ = concurrent.futures.wait(pending, timeout=delay)
+                if not done and self._allow():
+                    try:
+                        pending.add((hedge or start)())
+                    except Exception:
+                        self._refund()  # eg. no slot free, keep waiting on the original
+
+            while pending:
+                remaining = None if end is None else max(0, end - time.monotonic())
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                if not done:
+                    raise concurrent.futures.TimeoutError()
+
+                for f in done:
+                    if f.exception() is None:
+                        if f is not first:
+                            self._won()
+                        return f.result()
+
+            return first.result()  # everything failed, raise the original error
+        finally:
+            for f in pending:
+                f.cancel()
+
+    async def run_async(self, start, subject: str, timeout: float=None, hedge=None):
+        """As run(), for coroutines.
+
+        Args:
+            start: function () -> awaitable, sends the request
+            subject: subject (route) the request is sent to
+            timeout: seconds to wait for a result
+            hedge: function () -> awaitable, sends the hedge (see run()). By default `start`.
+
+        Returns:
+            ?
+
+        Raises:
+            asyncio.TimeoutError if there's no result in time
+            the error of the original request, if all requests failed
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        delay = self._delay(subject)
+
+        first = asyncio.ensure_future(start())
+        pending = {first}
+        try:
+            # no point hedging a request that will have timed out before the hedge is due
+            if delay is not None and (end is None or end - time.monotonic() > delay):
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._allow():
+                    try:
+                        pending.add(asyncio.ensure_future((hedge or start)()))
+                    except Exception:
+                        self._refund()  # eg. no slot free, keep waiting on the original
+
+            while pending:
+                remaining = None if end is None else max(0, end - time.monotonic())
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+
+                for f in done:
+                    if f.exception() is None:
+                        if f is not first:
+                            self._won()
+                        return f.result()
+
+            return first.result()
+        finally:
+            for f in pending:
+                f.cancel()
+
+    def report(self) -> dict:
+        """Return how many requests were made, how many were hedged & how many hedges won.
+
+        Returns:
+            dict
+        """
+        return {"requests": self.requests, "hedges": self.hedges, "wins": self.wins}
@@ -0,0 +1,51 @@
+"""A small memo of recently computed values, used to avoid re-encoding repeated queries.
+"""
+import collections
+import threading
+
+
+class Memo:
+    """Thread safe, size bounded memo that drops the least recently used values first.
+    """
+    def __init__(self, size: int=128):
+        """
+
+        Args:
+            size: max number of values to keep
+        """
+        self._size = size
+        self._values = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, compute):
+        """Return the value for the given key, computing it if we don't have it.
+
+        Args:
+            key: hashable key
+            compute: function () -> value, called (outside of our lock) on a miss
+
+        Returns:
+            ?
+        """
+        with self._lock:
+            try:
+                self._values.move_to_end(key)
+                return self._values[key]
+            except KeyError:
+                pass
+
+        value = compute()
+
+        with self._lock:
+            self._values[key] = value
+            if len(self._values) > self._size:
+                self._values.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
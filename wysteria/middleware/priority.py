@@ -0,0 +1,267 @@
+"""Request priorities, so interactive requests aren't stuck behind bulk work.
+
+Requests are sent in the priority lane of the caller, set with `lane()`. By default
+everything is interactive, batch jobs should mark their requests as bulk
+
+    with priority.lane(priority.BULK):
+        ... create thousands of resources ...
+
+Lanes are tracked per thread (& per asyncio task), so a batch job in one thread doesn't
+change the priority of requests made by other threads.
+
+When requests have to wait for a free slot, the NATS middleware hands freed slots to the
+waiting lanes in proportion to their weights (FairSlots), the gRPC middleware keeps some
+slots back for interactive calls that bulk calls can't use (ReservedSlots). Both record how
+long requests in each lane waited for a slot.
+"""
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+
+from wysteria import constants as consts
+from wysteria.middleware.latency import LatencyTracker
+
+
+INTERACTIVE = consts.PRIORITY_INTERACTIVE
+BULK = consts.PRIORITY_BULK
+LANES = (INTERACTIVE, BULK)
+
+_DEFAULT_INTERACTIVE_WEIGHT = 4  # interactive requests given a slot for every bulk request
+_DEFAULT_RESERVE_FRACTION = 0.25  # share of slots kept for interactive calls
+
+_LANE = contextvars.ContextVar("wysteria_priority_lane", default=INTERACTIVE)
+
+
+def current() -> str:
+    """Return the priority lane requests made now are sent in.
+
+    Returns:
+        str
+    """
+    return _LANE.get()
+
+
+@contextlib.contextmanager
+def lane(name: str):
+    """Send requests made within this block in the given lane.
+
+    Args:
+        name: INTERACTIVE or BULK
+
+    Raises:
+        ValueError if the lane isn't known
+    """
+    if name not in LANES:
+        raise ValueError("Unknown priority lane '%s'" % name)
+
+    token = _LANE.set(name)
+    try:
+        yield
+    finally:
+        _LANE.reset(token)
+
+
+class _Waiter:
+    """A caller waiting for a slot."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class FairSlots:
+    """A fixed number of slots, handed to waiting lanes by weighted fair queuing.
+
+    When a slot is freed it goes to the waiting lane that has had the least service for its
+    weight (stride scheduling), so with weights 4:1 interactive callers get four slots for
+    each one given to a bulk caller. Callers in the same lane are served in order.
+
+    Thread safe.
+    """
+    def __init__(self, size: int, weights: dict, waits: LatencyTracker=None):
+        """
+
+        Args:
+            size: number of slots
+            weights: lane -> weight
+            waits: records seconds callers in each lane waited for a slot
+        """
+        self._free = max(1, size)
+        self._strides = {name: 1.0 / max(weight, 1e-9) for name, weight in weights.items()}
+        self._passes = {name: 0.0 for name in weights}
+        self._vtime = 0.0  # pass of the lane served last
+        self._queues = {name: collections.deque() for name in weights}
+        self._lock = threading.Lock()
+        self.waits = waits or LatencyTracker()
+
+    def acquire(self, name: str, timeout: float=None) -> bool:
+        """Take a slot for a request in the given lane, waiting for one if need be.
+
+        Args:
+            name: lane of the request
+            timeout: seconds to wait
+
+        Returns:
+            bool, False if no slot was free in time
+        """
+        start = time.monotonic()
+        with self._lock:
+            if self._free > 0 and not any(self._queues.values()):
+                self._free -= 1
+                self.waits.observe(name, 0.0)
+                return True
+
+            queue = self._queues[name]
+            if not queue:
+                # a lane that has been idle doesn't get to bank credit
+                self._passes[name] = max(self._passes[name], self._vtime)
+            waiter = _Waiter()
+            queue.append(waiter)
+
+        waiter.event.wait(timeout)
+
+        with self._lock:
+            if not waiter.granted:
+                queue.remove(waiter)
+                return False
+
+        self.waits.observe(name, time.monotonic() - start)
+        return True
+
+    def release(self):
+        """Free a slot, handing it to the next waiting lane if any.
+        """
+        with self._lock:
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                self._free += 1
+                return
+
+            name = min(waiting, key=lambda n: self._passes[n])
+            self._vtime = self._passes[name]
+            self._passes[name] += self._strides[name]
+
+            waiter = self._queues[name].popleft()
+            waiter.granted = True
+            waiter.event.set()
+
+    @property
+    def waiting(self) -> dict:
+        """Return the number of callers waiting for a slot in each lane.
+
+        Returns:
+            {str: int}
+        """
+        return {name: len(queue) for name, queue in self._queues.items()}
+
+
+class ReservedSlots:
+    """A fixed number of slots, some of which are kept for interactive requests.
+
+    Interactive requests may use any slot, bulk requests only the shared ones. However
+    many bulk requests are running, `reserved` slots stay free for interactive requests.
+
+    Thread safe.
+    """
+    def __init__(self, size: int, reserved: int=None, waits: LatencyTracker=None):
+        """
+
+        Args:
+            size: number of slots
+            reserved: slots only interactive requests may use, by default a quarter
+            waits: records seconds callers in each lane waited for a slot
+        """
+        size = max(1, size)
+        if reserved is None:
+            reserved = int(size * _DEFAULT_RESERVE_FRACTION)
+        reserved = min(max(0, reserved), size - 1)  # bulk requests need a slot too
+
+        self._shared = size - reserved
+        self._reserved = reserved
+        self._cond = threading.Condition()
+        self._waiting = collections.Counter()
+        self.waits = waits or LatencyTracker()
+
+    def _take(self, name: str):
+        """Take a slot for the lane if one is free. Call with our lock held.
+
+        Returns:
+            bool or None, True if a reserved slot was taken, None if no slot is free
+        """
+        if self._shared > 0:
+            self._shared -= 1
+            return False
+        if name == INTERACTIVE and self._reserved > 0:
+            self._reserved -= 1
+            return True
+        return None
+
+    def acquire(self, name: str, timeout: float=None):
+        """Take a slot for a request in the given lane, waiting for one if need be.
+
+        Args:
+            name: lane of the request
+            timeout: seconds to wait
+
+        Returns:
+            bool or None, pass to release(). None if no slot was free in time
+        """
+        start = time.monotonic()
+        with self._cond:
+            self._waiting[name] += 1
+            try:
+                slot = None
+                if self._cond.wait_for(lambda: self._free_for(name), timeout):
+                    slot = self._take(name)
+            finally:
+                self._waiting[name] -= 1
+
+        if slot is not None:
+            self.waits.observe(name, time.monotonic() - start)
+        return slot
+
+    def _free_for(self, name: str) -> bool:
+        return self._shared > 0 or (name == INTERACTIVE and self._reserved > 0)
+
+    def release(self, reserved: bool):
+        """Free a slot.
+
+        Args:
+            reserved: value returned by acquire()
+        """
+        with self._cond:
+            if reserved:
+                self._reserved += 1
+            else:
+                self._shared += 1
+            self._cond.notify_all()
+
+    @property
+    def waiting(self) -> dict:
+        """Return the number of callers waiting for a slot in each lane.
+
+        Returns:
+            {str: int}
+        """
+        return {name: self._waiting[name] for name in LANES}
+
+
+def report(waits: LatencyTracker, waiting: list) -> dict:
+    """Return queue wait percentiles & the number of callers waiting in each lane.
+
+    Args:
+        waits: seconds callers in each lane waited for a slot
+        waiting: []{str: int} callers waiting, of each set of slots
+
+    Returns:
+        dict
+    """
+    latencies = waits.report()
+    return {
+        name: dict(
+            latencies.get(name, {"p50": 0.0, "p90": 0.0, "p99": 0.0}),
+            waiting=sum(w.get(name, 0) for w in waiting),
+        ) for name in LANES
+    }
@@ -0,0 +1,95 @@
+"""Coalescing of identical requests made at the same time.
+
+When several threads ask for the same thing at once (eg. the same published version, or
+the same find query) only the first request goes to the server, the others wait for it &
+are handed the same result (or error).
+
+A caller waiting on another's request still honours its own deadline. If the request it
+waited on ran out of time under a shorter deadline, it sends the request itself.
+"""
+import threading
+
+from wysteria import errors
+from wysteria.middleware import deadline
+
+
+class _Flight:
+    """A request in flight & the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Singleflight:
+    """Runs at most one call per key at a time, sharing its result with concurrent callers.
+
+    Thread safe.
+    """
+    def __init__(self):
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        """Return fn(), or the result of the call of it already in flight for the key.
+
+        Args:
+            key: hashable key, the same for calls that would return the same thing
+            fn: function () -> result
+
+        Returns:
+            result of fn
+
+        Raises:
+            whatever fn raises
+            DeadlineExceededError if our deadline passes while waiting on another caller
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.collapsed += 1
+
+        if leader:
+            try:
+                flight.result = fn()
+                return flight.result
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.done.set()
+
+        if not flight.done.wait(deadline.timeout()):
+            raise errors.DeadlineExceededError("Deadline exceeded")
+        if isinstance(flight.error, errors.DeadlineExceededError):
+            return fn()  # it ran out of time under a deadline shorter than ours
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def forget(self):
+        """Don't let calls made from now on wait on calls already in flight.
+
+        Used when we write something, so reads made after the write don't get results read
+        before it.
+        """
+        with self._lock:
+            self._flights.clear()
+
+    def report(self) -> dict:
+        """Return the number of calls made & how many of them shared another's request.
+
+        Returns:
+            dict
+        """
+        return {"calls": self.calls, "collapsed": self.collapsed}
@@ -16,6 +16,85 @@ _KEY_MWARE_SSL_KEY = "sslkey"
 _KEY_MWARE_SSL_PEM = "sslpem"
 _KEY_MWARE_SSL_VERIFY = "sslverify"
 _KEY_MWARE_SSL_ENABLE = "sslenabletls"
+_KEY_MWARE_MAX_IN_FLIGHT = "maxinflight"
+_KEY_MWARE_MAX_RECONNECTS = "maxreconnects"
+_KEY_MWARE_CODEC = "codec"
+_KEY_MWARE_MIN_TIMEOUT = "mintimeout"
+_KEY_MWARE_MAX_TIMEOUT = "maxtimeout"
+_KEY_MWARE_MAX_SEND_SIZE = "maxsendmessagesize"
+_KEY_MWARE_MAX_RECV_SIZE = "maxreceivemessagesize"
+_KEY_MWARE_KEEPALIVE_TIME = "keepalivetime"
+_KEY_MWARE_KEEPALIVE_TIMEOUT = "keepalivetimeout"
+_KEY_MWARE_COMPRESSION = "compression"
+_KEY_MWARE_READY_TIMEOUT = "readytimeout"
+_KEY_MWARE_POOL_SIZE = "poolsize"
+_KEY_MWARE_POOL_STRATEGY = "poolstrategy"
+_KEY_MWARE_PROBE_INTERVAL = "probeinterval"
+_KEY_MWARE_PROBE_TIMEOUT = "probetimeout"
+_KEY_MWARE_LAZY = "lazy"
+_KEY_MWARE_HEDGE = "hedge"
+_KEY_MWARE_HEDGE_RATIO = "hedgeratio"
+_KEY_MWARE_INTERACTIVE_WEIGHT = "interactiveweight"
+_KEY_MWARE_INTERACTIVE_RESERVE = "interactivereserve"
+_KEY_MWARE_TIMEOUT = "timeout"
+_KEY_MWARE_BATCH_WINDOW = "batchwindow"
+_KEY_MWARE_BATCH_SIZE = "batchsize"
+
+_KEY_CACHE = "cache"
+_KEY_CACHE_SIZE = "size"
+_KEY_CACHE_TTL = "%sttl"  # eg. ItemTTL, seconds items are cached for
+_KEY_CACHE_QUERY_SIZE = "querysize"
+_KEY_CACHE_QUERY_BYTES = "querybytes"
+_KEY_CACHE_QUERY_TTL = "queryttl"
+_KEY_CACHE_PUBLISHED_SIZE = "publishedsize"
+_KEY_CACHE_PUBLISHED_TTL = "publishedttl"
+_KEY_CACHE_DISK_DIR = "diskdir"
+_KEY_CACHE_DISK_TTL = "disk%sttl"  # eg. DiskItemTTL
+_KEY_CACHE_NEGATIVE_SIZE = "negativesize"
+_KEY_CACHE_NEGATIVE_TTL = "negativettl"
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+# optional, middleware specific settings: driver -> {config key: (middleware kwarg, parser)}
+_MWARE_OPTIONS = {
+    "nats": {
+        _KEY_MWARE_MAX_IN_FLIGHT: ("max_in_flight", int),
+        _KEY_MWARE_MAX_RECONNECTS: ("max_reconnects", int),
+        _KEY_MWARE_POOL_SIZE: ("pool_size", int),
+        _KEY_MWARE_POOL_STRATEGY: ("pool_strategy", str),
+        _KEY_MWARE_CODEC: ("codec", str),
+        _KEY_MWARE_MIN_TIMEOUT: ("min_timeout", float),
+        _KEY_MWARE_MAX_TIMEOUT: ("max_timeout", float),
+        _KEY_MWARE_HEDGE: ("hedge", _parse_bool),
+        _KEY_MWARE_HEDGE_RATIO: ("hedge_ratio", float),
+        _KEY_MWARE_INTERACTIVE_WEIGHT: ("interactive_weight", int),
+        _KEY_MWARE_BATCH_WINDOW: ("batch_window", float),
+        _KEY_MWARE_BATCH_SIZE: ("batch_size", int),
+    },
+    "grpc": {
+        _KEY_MWARE_MAX_SEND_SIZE: ("max_send_message_size", int),
+        _KEY_MWARE_MAX_RECV_SIZE: ("max_receive_message_size", int),
+        _KEY_MWARE_KEEPALIVE_TIME: ("keepalive_time", float),
+        _KEY_MWARE_KEEPALIVE_TIMEOUT: ("keepalive_timeout", float),
+        _KEY_MWARE_COMPRESSION: ("compression", str),
+        _KEY_MWARE_READY_TIMEOUT: ("ready_timeout", float),
+        _KEY_MWARE_POOL_SIZE: ("pool_size", int),
+        _KEY_MWARE_POOL_STRATEGY: ("pool_strategy", str),
+        _KEY_MWARE_PROBE_INTERVAL: ("probe_interval", float),
+        _KEY_MWARE_PROBE_TIMEOUT: ("probe_timeout", float),
+        _KEY_MWARE_LAZY: ("lazy", _parse_bool),
+        _KEY_MWARE_HEDGE: ("hedge", _parse_bool),
+        _KEY_MWARE_HEDGE_RATIO: ("hedge_ratio", float),
+        _KEY_MWARE_MAX_IN_FLIGHT: ("max_in_flight", int),
+        _KEY_MWARE_INTERACTIVE_RESERVE: ("interactive_reserve", int),
+        _KEY_MWARE_TIMEOUT: ("timeout", float),
+        _KEY_MWARE_BATCH_WINDOW: ("batch_window", float),
+        _KEY_MWARE_BATCH_SIZE: ("batch_size", int),
+    },
+}
 
 
 _SSLConfig = namedtuple("SSLConfig", [
@@ -57,6 +136,75 @@ def _read_config(configpath: str) -> dict:
     return data
 
 
+def _middleware_options(driver: str, middleware: dict) -> dict:
+    """Pull out any optional middleware specific settings that have been set.
+
+    Args:
+        driver (str): name of the middleware
+        middleware (dict): middleware section of the config
+
+    Returns:
+        dict
+    """
+    options = {}
+    for key, (kwarg, parser) in _MWARE_OPTIONS.get(driver.lower(), {}).items():
+        value = middleware.get(key)
+        if value:
+            options[kwarg] = parser(value)
+    return options
+
+
+def _cache_options(section: dict) -> dict:
+    """Pull out the cache settings that have been set.
+
+    Args:
+        section (dict): cache section of the config
+
+    Returns:
+        dict
+    """
+    options = {}
+    if section.get(_KEY_CACHE_SIZE):
+        options["cache_size"] = int(section[_KEY_CACHE_SIZE])
+
+    ttl = {
+        kind: float(section[_KEY_CACHE_TTL % kind])
+        for kind in ("collection", "item", "version", "resource", "link")
+        if section.get(_KEY_CACHE_TTL % kind)
+    }
+    if ttl:
+        options["cache_ttl"] = ttl
+
+    if section.get(_KEY_CACHE_QUERY_SIZE):
+        options["query_cache_size"] = int(section[_KEY_CACHE_QUERY_SIZE])
+    if section.get(_KEY_CACHE_QUERY_BYTES):
+        options["query_cache_bytes"] = int(section[_KEY_CACHE_QUERY_BYTES])
+    if section.get(_KEY_CACHE_QUERY_TTL):
+        options["query_cache_ttl"] = float(section[_KEY_CACHE_QUERY_TTL])
+
+    if section.get(_KEY_CACHE_PUBLISHED_SIZE):
+        options["published_cache_size"] = int(section[_KEY_CACHE_PUBLISHED_SIZE])
+    if section.get(_KEY_CACHE_PUBLISHED_TTL):
+        options["published_cache_ttl"] = float(section[_KEY_CACHE_PUBLISHED_TTL])
+
+    if section.get(_KEY_CACHE_DISK_DIR):
+        options["disk_cache_dir"] = section[_KEY_CACHE_DISK_DIR]
+
+    disk_ttl = {
+        kind: float(section[_KEY_CACHE_DISK_TTL % kind])
+        for kind in ("collection", "item", "version", "resource", "link", "published")
+        if section.get(_KEY_CACHE_DISK_TTL % kind)
+    }
+    if disk_ttl:
+        options["disk_cache_ttl"] = disk_ttl
+
+    if section.get(_KEY_CACHE_NEGATIVE_SIZE):
+        options["negative_cache_size"] = int(section[_KEY_CACHE_NEGATIVE_SIZE])
+    if section.get(_KEY_CACHE_NEGATIVE_TTL):
+        options["negative_cache_ttl"] = float(section[_KEY_CACHE_NEGATIVE_TTL])
+    return options
+
+
 def from_config(configpath: str) -> Client:
     """Build a wysteria Client from a given config file.
 
@@ -77,10 +225,14 @@ def from_config(configpath: str) -> Client:
         middleware.get(_KEY_MWARE_SSL_ENABLE, "false") == 'true',
     )
 
+    driver = middleware.get(_KEY_MWARE_DRIVER, "nats")
+
     return Client(
         url=middleware.get(_KEY_MWARE_CONF),
-        middleware=middleware.get(_KEY_MWARE_DRIVER, "nats"),
+        middleware=driver,
         tls=tls,
+        **_cache_options(data.get(_KEY_CACHE, {})),
+        **_middleware_options(driver, middleware)
     )
 
 